@@ -1,25 +1,40 @@
+import hashlib
+import json
+import logging
+from collections import Counter
 from datetime import datetime, timedelta
+from functools import lru_cache
 
+from django.conf import settings
+from django.db.models import Case, IntegerField, Max, Value, When
 from django.utils import timezone
 
 import pytz
 
+from . import scheduling
 from .client import reddit
+from .more_comments import expand_comments
+from .sketches import add_authors
 from .models import (
     Comment,
+    CommentBody,
     CommentSnapshot,
     Post,
+    PostBody,
     PostSnapshot,
     Subreddit,
     User,
 )
 
+logger = logging.getLogger(__name__)
 
 POST_MAP = {
     'api_id': 'name',
     'permalink': 'permalink',
     'url': 'url',
     'title': 'title',
+}
+POST_BODY_MAP = {
     'text': 'selftext',
     'html': 'selftext_html',
 }
@@ -34,6 +49,8 @@ COMMENT_MAP = {
     'api_id': 'name',
     'permalink': 'permalink',
     'depth': 'depth',
+}
+COMMENT_BODY_MAP = {
     'text': 'body',
     'html': 'body_html',
 }
@@ -42,6 +59,17 @@ COMMENT_SNAPSHOT_MAP = {
     'ups': 'ups',
     'downs': 'downs',
 }
+# Comments in the threads posted by QA_AUTHOR with titles starting with
+# QA_TITLE are the questions and answers of the daily Q&A.
+QA_AUTHOR = 'AutoModerator'
+QA_TITLE = 'Daily Q & A!'
+BOTS = {'AutoModerator'}
+# How far back the new listing is walked on each fetch.
+LISTING_WINDOW = timedelta(days=1)
+# The number of fullnames Reddit accepts in a single info request.
+INFO_BATCH_SIZE = 100
+# The most users get_or_create_user keeps, the least recently used go first.
+USER_CACHE_SIZE = 10000
 
 
 def convert_props(obj, map):
@@ -55,23 +83,130 @@ def parse_datetime(value):
     return pytz.UTC.localize(datetime.utcfromtimestamp(value))
 
 
-def fetch_data():
-    client = reddit()
+def content_hash(*maps):
+    """Return a short digest of the fields in the property maps."""
+    content = {}
+    for props in maps:
+        content.update(props)
+    data = json.dumps(content, sort_keys=True).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=8).hexdigest()
+
+
+def chunks(items, size):
+    for position in range(0, len(items), size):
+        yield items[position:position + size]
+
+
+def fetch_data(client=None):
+    client = client or reddit()
     for subreddit in Subreddit.objects.iterator():
-        _fetch_moderators(client, subreddit)
-        for post, api_post in _fetch_posts(client, subreddit):
-            _fetch_comments(post, api_post)
+        fetch_subreddit(client, subreddit)
+    refresh_data(client)
 
 
+def fetch_subreddit(client, subreddit):
+    """Fetch the moderators and the new or due posts of a subreddit."""
+    counts = Counter()
+    # Rows past these ids are new, and their authors go into the sketches.
+    newest_post = Post.objects.aggregate(id=Max('id'))['id'] or 0
+    newest_comment = Comment.objects.aggregate(id=Max('id'))['id'] or 0
+    try:
+        _fetch_moderators(client, subreddit)
+        for post, api_post in _fetch_posts(client, subreddit, counts):
+            _fetch_comments(post, api_post, counts)
+    finally:
+        # What was saved before a failure is still sketched, without hiding
+        # the failure.
+        try:
+            add_authors(
+                subreddit,
+                Post.objects.filter(id__gt=newest_post, subreddit=subreddit),
+                Comment.objects.filter(
+                    id__gt=newest_comment, subreddit=subreddit),
+            )
+        except Exception:
+            logger.exception(
+                'Sketching the authors of r/%s failed.', subreddit.name)
+        logger.info('Fetched r/%s: %s.', subreddit.name, ', '.join(
+            f'{count} {outcome}'
+            for outcome, count in sorted(counts.items())))
+    Subreddit.objects.filter(pk=subreddit.pk).update(ingested=timezone.now())
+
+
+def refresh_data(client=None):
+    """
+    Snapshot the scores of the posts that are due a refresh and of their
+    known comments.
+
+    Unlike fetch_data this doesn't discover new posts or comments, it
+    looks up the stored fullnames in batches instead. Posts still in the
+    listing window are left to fetch_data, so their new comments are found
+    when they are refreshed.
+    """
+    client = client or reddit()
+    now = timezone.now()
+    due = {
+        'next_refresh__lte': now,
+        'created__lt': now - LISTING_WINDOW,
+    }
+    posts = {
+        post.api_id: post
+        for post in Post.objects.filter(**due)
+    }
+    comments = {
+        api_id: (comment_id, score)
+        for api_id, comment_id, score in Comment.objects.filter(
+            **{f'post__{lookup}': value for lookup, value in due.items()}
+        ).values_list('api_id', 'id', 'score')
+    }
+    subreddits = {post.subreddit_id for post in posts.values()}
+
+    for fullnames in chunks(list(posts), INFO_BATCH_SIZE):
+        snapshots = []
+        for submission in client.info(fullnames):
+            post = posts.pop(submission.name)
+            snapshots.append(PostSnapshot(
+                post=post,
+                **convert_props(submission, POST_SNAPSHOT_MAP)
+            ))
+            _schedule_refresh(post, submission.score)
+        PostSnapshot.objects.bulk_create(snapshots)
+    # Posts Reddit no longer returns still need to age out of the schedule.
+    for post in posts.values():
+        _schedule_refresh(post, post.refreshed_score)
+
+    for fullnames in chunks(list(comments), INFO_BATCH_SIZE):
+        snapshots = []
+        scores = {}
+        for api_comment in client.info(fullnames):
+            comment_id, score = comments[api_comment.name]
+            snapshots.append(CommentSnapshot(
+                comment_id=comment_id,
+                **convert_props(api_comment, COMMENT_SNAPSHOT_MAP)
+            ))
+            if api_comment.score != score:
+                scores[comment_id] = api_comment.score
+        CommentSnapshot.objects.bulk_create(snapshots)
+        _update_scores(scores)
+    Subreddit.objects.filter(pk__in=subreddits).update(
+        ingested=timezone.now())
+
+
+def _update_scores(scores):
+    """Set the scores of the comments in ``scores`` in one statement."""
+    if not scores:
+        return
+    Comment.objects.filter(pk__in=scores).update(score=Case(*[
+        When(pk=comment_id, then=Value(score))
+        for comment_id, score in scores.items()
+    ], output_field=IntegerField()))
+
+
+@lru_cache(maxsize=USER_CACHE_SIZE)
 def get_or_create_user(username):
     """Simple wrapper around get_or_create that utilizes in-memory caching"""
-    cache = get_or_create_user._cache
-    if username in cache:
-        return cache[username]
     user, _ = User.objects.get_or_create(username=username)
-    cache[username] = user
     return user
-get_or_create_user._cache = {}
 
 
 def _fetch_moderators(client, subreddit):
@@ -82,19 +217,53 @@ def _fetch_moderators(client, subreddit):
     subreddit.moderators = mods
 
 
-def _update_post(subreddit, submission):
-    """Update/Create a post for the submission"""
+def _save_content(model, body_model, obj, lookup, props, body):
+    """
+    Create a post or comment and its body, or update the stored ``obj``
+    and mark it edited if its content was hashed before.
+    """
+    if obj is None:
+        obj = model.objects.create(**lookup, **props)
+        body_model.objects.create(pk=obj.pk, **body)
+        return obj
+    if obj.content_hash is not None:
+        props['edited'] = timezone.now()
+    for field, value in props.items():
+        setattr(obj, field, value)
+    obj.save(update_fields=list(props))
+    body_model.objects.update_or_create(pk=obj.pk, defaults=body)
+    return obj
+
+
+def _is_qa_thread(post):
+    return (
+        post.author.username == QA_AUTHOR and post.title.startswith(QA_TITLE))
+
+
+def _update_post(subreddit, submission, post, counts):
+    """
+    Create a post for the submission, or update the stored ``post`` when
+    its content has changed.
+    """
     props = convert_props(submission, POST_MAP)
     api_id = props.pop('api_id')
+    body = convert_props(submission, POST_BODY_MAP)
+    digest = content_hash(props, body)
+    if post is not None and post.content_hash == digest:
+        counts['posts unchanged'] += 1
+        return post
+    counts['posts updated' if post else 'posts created'] += 1
     props.update({
         'created': parse_datetime(submission.created_utc),
         'author': get_or_create_user(submission.author.name),
+        'content_hash': digest,
     })
-    post, _ = Post.objects.update_or_create(
-        api_id=api_id,
-        subreddit=subreddit,
-        defaults=props
-    )
+    retitled = post is not None and post.title != props['title']
+    post = _save_content(
+        Post, PostBody, post, {'api_id': api_id, 'subreddit': subreddit},
+        props, body)
+    if retitled:
+        post.comments.update(is_qa_thread=_is_qa_thread(post))
     return post
 
 
@@ -106,56 +275,112 @@ def _create_post_snapshot(post, submission):
     )
 
 
-def _update_comment(post, api_comment):
-    """Update/Create a comment"""
+def _schedule_refresh(post, score):
+    """Record the refresh of a post and schedule its next one."""
+    now = timezone.now()
+    rate = scheduling.velocity(
+        score, post.refreshed_score, post.refreshed and now - post.refreshed)
+    Post.objects.filter(pk=post.pk).update(
+        refreshed=now,
+        refreshed_score=score,
+        next_refresh=scheduling.next_refresh(post.created, now, rate),
+    )
+
+
+def _refresh_post(subreddit, submission, post, counts):
+    """Update a post, snapshot its score and schedule its next refresh."""
+    post = _update_post(subreddit, submission, post, counts)
+    _create_post_snapshot(post, submission)
+    _schedule_refresh(post, submission.score)
+    return post
+
+
+def _update_comment(post, api_comment, stored, counts):
+    """
+    Create a comment, or update the one in ``stored`` when its content has
+    changed. ``stored`` maps the fullnames of the post's comments to them.
+    """
     props = convert_props(api_comment, COMMENT_MAP)
     api_id = props.pop('api_id')
+    body = convert_props(api_comment, COMMENT_BODY_MAP)
+    digest = content_hash(props, body)
+    comment = stored.get(api_id)
+    if comment is not None and comment.content_hash == digest:
+        counts['comments unchanged'] += 1
+        return comment
+    counts['comments updated' if comment else 'comments created'] += 1
+    parent_id = api_comment.parent_id
+    author = api_comment.author
     props.update({
         'created': parse_datetime(api_comment.created_utc),
-        'author': get_or_create_user(api_comment.author.name) if api_comment.author else None,
+        'author': get_or_create_user(author.name) if author else None,
+        'author_is_bot': bool(author) and author.name in BOTS,
         'parent': (
-            Comment.objects.get(api_id=api_comment.parent_id)
-            if api_comment.parent_id.startswith('t1')
+            stored.get(parent_id) or Comment.objects.get(api_id=parent_id)
+            if parent_id.startswith('t1')
             else None
-        )
+        ),
+        'content_hash': digest,
     })
-    post, _ = Comment.objects.update_or_create(
-        api_id=api_id,
-        post=post,
-        defaults=props
-    )
-    return post
+    lookup = {
+        'api_id': api_id,
+        'post': post,
+        'subreddit_id': post.subreddit_id,
+        'is_qa_thread': _is_qa_thread(post),
+        'score': api_comment.score,
+    }
+    comment = _save_content(
+        Comment, CommentBody, comment, lookup, props, body)
+    stored[api_id] = comment
+    return comment
 
 
 def _create_comment_snapshot(comment, api_comment):
-    """Create a comment snapshot"""
+    """Create a comment snapshot and keep the comment's score current"""
     CommentSnapshot.objects.create(
         comment=comment,
         **convert_props(api_comment, COMMENT_SNAPSHOT_MAP)
     )
+    if comment.score != api_comment.score:
+        comment.score = api_comment.score
+        Comment.objects.filter(pk=comment.pk).update(score=comment.score)
 
 
-def _fetch_posts(client, subreddit):
-    """Fetch all posts from today and update their data"""
+def _fetch_posts(client, subreddit, counts):
+    """
+    Fetch all posts from today and update the new ones and the ones
+    due a refresh.
+    """
     after = None
     oldest = None
-    yesterday = timezone.now() - timedelta(days=1)
-    while not oldest or oldest > yesterday:
-        submissions = client.subreddit(subreddit.name).new(
-            limit=100, params={'after': after})
+    now = timezone.now()
+    window_start = now - LISTING_WINDOW
+    while not oldest or oldest > window_start:
+        submissions = list(client.subreddit(subreddit.name).new(
+            limit=100, params={'after': after}))
+        if not submissions:
+            break
+        stored = {
+            post.api_id: post
+            for post in Post.objects.filter(
+                api_id__in=[s.name for s in submissions],
+            ).select_related('author')
+        }
         for api_data in submissions:
-            post = _update_post(subreddit, api_data)
-            _create_post_snapshot(post, api_data)
-            after = post.api_id
-            oldest = post.created
+            after = api_data.name
+            oldest = parse_datetime(api_data.created_utc)
+            post = stored.get(api_data.name)
+            if post and post.next_refresh and post.next_refresh > now:
+                continue
+            post = _refresh_post(subreddit, api_data, post, counts)
             yield post, api_data
 
 
-def _fetch_comments(post, api_post):
+def _fetch_comments(post, api_post, counts):
     """Fetch and update the comments for a given post."""
-    api_post.comments.replace_more(limit=0)
-    for api_comment in api_post.comments.list():
-        comment = _update_comment(post, api_comment)
+    stored = {comment.api_id: comment for comment in post.comments.all()}
+    for api_comment in expand_comments(api_post, **settings.MORE_COMMENTS):
+        comment = _update_comment(post, api_comment, stored, counts)
         _create_comment_snapshot(comment, api_comment)
 
 
@@ -1,32 +1,149 @@
+import json
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.db import connections
 
 from .models import (
     Post,
+    PostBody,
     PostSnapshot,
+    CommentBody,
     CommentSnapshot,
     Comment,
 )
 
 
+CURSOR_VAR = 'before'
+
+
+def estimated_count(queryset):
+    """
+    Return the query planner's estimate of the number of rows in the
+    queryset on PostgreSQL, or the exact count on other databases.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetChangeList(ChangeList):
+    """
+    A changelist that pages backwards through primary keys rather than by
+    offset and reports an estimated result count.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super(KeysetChangeList, self).get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Changing the filters starts again from the first page.
+        new_params = dict({CURSOR_VAR: None}, **(new_params or {}))
+        return super(KeysetChangeList, self).get_query_string(
+            new_params, remove)
+
+    def get_ordering(self, request, queryset):
+        return ['-pk']
+
+    @staticmethod
+    def cursor(request):
+        """Return the cursor, ignoring one that isn't a primary key."""
+        try:
+            return int(request.GET[CURSOR_VAR])
+        except (KeyError, ValueError):
+            return None
+
+    def get_results(self, request):
+        queryset = self.queryset
+        cursor = self.cursor(request)
+        if cursor:
+            queryset = queryset.filter(pk__lt=cursor)
+        result_list = list(queryset[:self.list_per_page + 1])
+        self.next_cursor = None
+        if len(result_list) > self.list_per_page:
+            result_list = result_list[:self.list_per_page]
+            self.next_cursor = result_list[-1].pk
+        self.is_first_page = not cursor
+        self.result_count = estimated_count(self.queryset)
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = result_list
+        self.can_show_all = False
+        self.multi_page = False
+        self.paginator = None
+
+    @property
+    def next_page_url(self):
+        return self.get_query_string({CURSOR_VAR: self.next_cursor})
+
+    @property
+    def first_page_url(self):
+        return self.get_query_string()
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    An admin for tables too big to count or page through by offset.
+
+    Related objects are picked by raw id rather than loaded into dropdowns
+    and the changelist drills down by the indexed ``created`` date.
+    """
+    change_list_template = 'admin/reddit/keyset_change_list.html'
+    date_hierarchy = 'created'
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+
+class BodyInline(admin.StackedInline):
+    fields = ['text', 'html']
+    readonly_fields = ['text', 'html']
+    can_delete = False
+
+
+class PostBodyInline(BodyInline):
+    model = PostBody
+
+
+class CommentBodyInline(BodyInline):
+    model = CommentBody
+
+
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ['author', 'created', 'title']
     list_select_related = ['author']
+    inlines = [PostBodyInline]
 
 
 @admin.register(PostSnapshot)
-class PostSnapshotAdmin(admin.ModelAdmin):
+class PostSnapshotAdmin(LargeTableAdmin):
     list_display = ['post', 'created', 'ups', 'score', 'comment_count']
     list_select_related = ['post']
+    raw_id_fields = ['post']
 
 
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(LargeTableAdmin):
     list_display = ['post', 'author', 'created', 'api_id']
     list_select_related = ['author', 'post']
+    raw_id_fields = ['post', 'author', 'parent']
+    inlines = [CommentBodyInline]
 
 
 @admin.register(CommentSnapshot)
-class CommentSnapshotAdmin(admin.ModelAdmin):
+class CommentSnapshotAdmin(LargeTableAdmin):
     list_display = ['comment', 'created', 'ups', 'score']
     list_select_related = ['comment']
+    raw_id_fields = ['comment']
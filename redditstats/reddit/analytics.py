@@ -0,0 +1,103 @@
+"""Score statistics computed over many snapshot histories at once."""
+import numpy as np
+
+HOUR_SECONDS = 60 * 60
+
+
+class ScoreHistories(object):
+    """
+    The snapshot histories of many posts or comments held in flat arrays.
+
+    Snapshots are sorted by parent then time, so each parent's history is
+    a contiguous run starting at an offset in ``starts``. Every statistic
+    returns one value per parent, in the order of ``ids``.
+    """
+
+    def __init__(self, parents, created, times, scores):
+        self.times = times
+        self.scores = scores
+        if len(parents):
+            self.starts = np.flatnonzero(
+                np.concatenate([[True], parents[1:] != parents[:-1]]))
+        else:
+            self.starts = np.array([], dtype=int)
+        self.ids = parents[self.starts]
+        self.created = created[self.starts]
+        # The position of each snapshot's parent in ids.
+        self.groups = np.repeat(
+            np.arange(len(self.starts)),
+            np.diff(np.append(self.starts, len(parents))))
+
+    @classmethod
+    def load(cls, snapshots, parent):
+        """
+        Load a snapshot queryset, e.g. ``PostSnapshot.objects.filter(...)``
+        with ``parent='post'``, in a single query.
+        """
+        rows = list(snapshots.order_by(parent, 'created').values_list(
+            parent, f'{parent}__created', 'created', 'score'))
+        if not rows:
+            empty = np.array([])
+            return cls(np.array([], dtype=int), empty, empty, empty)
+        parents, created, times, scores = zip(*rows)
+        return cls(
+            np.array(parents),
+            np.array([c.timestamp() for c in created]),
+            np.array([t.timestamp() for t in times]),
+            np.array(scores, dtype=float),
+        )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _reduce(self, ufunc, values):
+        if not len(self):
+            return np.array([])
+        return ufunc.reduceat(values, self.starts)
+
+    def velocities(self):
+        """Return the points per hour gained since each previous snapshot."""
+        velocity = np.full(len(self.times), -np.inf)
+        elapsed = np.diff(self.times)
+        same = (self.groups[1:] == self.groups[:-1]) & (elapsed > 0)
+        velocity[1:][same] = (
+            np.diff(self.scores)[same] / elapsed[same] * HOUR_SECONDS)
+        return velocity
+
+    def growth_rate(self):
+        """Return the points per hour between the first and last snapshot."""
+        if not len(self):
+            return np.array([])
+        ends = np.append(self.starts[1:], len(self.times)) - 1
+        elapsed = self.times[ends] - self.times[self.starts]
+        gained = self.scores[ends] - self.scores[self.starts]
+        rate = np.zeros(len(self))
+        np.divide(gained, elapsed, out=rate, where=elapsed > 0)
+        return rate * HOUR_SECONDS
+
+    def peak_velocity(self):
+        """Return the fastest points per hour between two snapshots."""
+        peak = self._reduce(np.maximum, self.velocities())
+        return np.where(np.isfinite(peak), peak, 0)
+
+    def time_to_score(self, points):
+        """Return the seconds from creation to reaching ``points``, or NaN."""
+        reached = np.where(self.scores >= points, self.times, np.inf)
+        first = self._reduce(np.minimum, reached) - self.created
+        return np.where(np.isfinite(first), first, np.nan)
+
+    def score_within(self, seconds):
+        """Return the highest score seen within ``seconds`` of creation."""
+        early = self.times <= self.created[self.groups] + seconds
+        best = self._reduce(np.maximum, np.where(early, self.scores, -np.inf))
+        return np.where(np.isfinite(best), best, np.nan)
+
+
+def fastest_rising(histories, count):
+    """Return (id, peak velocity) for the ``count`` fastest risers."""
+    peaks = histories.peak_velocity()
+    order = np.argsort(-peaks, kind='mergesort')[:count]
+    return [
+        (int(histories.ids[i]), float(peaks[i]))
+        for i in order if peaks[i] > 0
+    ]
@@ -0,0 +1,120 @@
+"""A two tier cache for the rendered partials."""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.http import quote_etag
+
+
+class LocalCache(object):
+    """A small thread-safe least recently used cache with expiring entries."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            value, expires = self.entries[key]
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_cache = LocalCache(settings.FRAGMENT_CACHE['LOCAL_SIZE'])
+
+
+def _key(request):
+    url = request.build_absolute_uri().encode('utf-8')
+    return 'fragment:' + hashlib.md5(url).hexdigest()
+
+
+def _response(entry):
+    content, content_type, _, version = entry
+    response = HttpResponse(content, content_type=content_type)
+    if version is not None:
+        # A stale entry keeps the ETag of the version it was rendered for.
+        response['ETag'] = quote_etag(version)
+    return response
+
+
+def fragment_cache(timeout, version=None):
+    """
+    Cache a view's rendered response for ``timeout`` seconds.
+
+    Responses are kept briefly in a per-process cache in front of the
+    shared cache. Once a response is older than ``timeout``, one worker
+    takes a lease and renders it again. Until it's done the other workers
+    keep serving the stale response instead of rendering it as well.
+
+    ``version`` is called with the view's arguments and its result stored
+    with the response. A response of another version is stale, and is
+    served with its own version as the ETag while it's rendered again.
+    """
+    options = settings.FRAGMENT_CACHE
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+            key = _key(request)
+            current = version and version(request, *args, **kwargs)
+            now = time.time()
+
+            def fresh(entry):
+                return (
+                    entry is not None and entry[2] > now and
+                    entry[3] == current)
+
+            entry = local_cache.get(key)
+            if not fresh(entry):
+                entry = cache.get(key)
+                if entry is not None and len(entry) != 4:
+                    # Cached before responses were versioned.
+                    entry = None
+                if entry is not None:
+                    local_cache.set(key, entry, options['LOCAL_TIMEOUT'])
+            if fresh(entry):
+                return _response(entry)
+            lease = key + ':lease'
+            leased = cache.add(lease, True, options['LEASE_TIMEOUT'])
+            if entry is not None and not leased:
+                return _response(entry)
+            try:
+                response = view(request, *args, **kwargs)
+                if hasattr(response, 'render') and not response.is_rendered:
+                    response.render()
+                if response.status_code == 200:
+                    entry = (
+                        response.content, response['Content-Type'],
+                        now + timeout, current)
+                    cache.set(key, entry, timeout + options['STALE_TIMEOUT'])
+                    local_cache.set(key, entry, options['LOCAL_TIMEOUT'])
+            finally:
+                if leased:
+                    cache.delete(lease)
+            return response
+        return wrapper
+    return decorator
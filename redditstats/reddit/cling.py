@@ -0,0 +1,23 @@
+import os
+
+from django.conf import settings
+from dj_static import Cling
+
+
+class PublishedCling(Cling):
+    """
+    WSGI middleware that serves the published dashboard at / while
+    publishing is enabled.
+    """
+
+    def __init__(self, application):
+        super(PublishedCling, self).__init__(
+            application, base_dir=settings.PUBLISH_ROOT, ignore_debug=True)
+
+    def get_base_url(self):
+        return '/'
+
+    def _should_handle(self, path):
+        return (
+            path == '/' and settings.PUBLISH_DASHBOARD and
+            os.path.exists(os.path.join(settings.PUBLISH_ROOT, 'index.html')))
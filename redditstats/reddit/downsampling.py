@@ -0,0 +1,37 @@
+"""Reduce time series to fewer points while keeping their shape."""
+
+
+def lttb(points, threshold):
+    """
+    Downsample ``points`` to ``threshold`` points with the
+    Largest-Triangle-Three-Buckets algorithm.
+
+    ``points`` is a list of (x, y) pairs sorted by x, where x is a number.
+    The first and last points are always kept. From each bucket in between,
+    the point forming the largest triangle with the previously kept point
+    and the average of the next bucket is kept, which preserves peaks and
+    troughs that averaging would flatten.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = points[0]
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[end:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+        prev_x, prev_y = previous
+        previous = max(
+            points[start:end],
+            key=lambda point: abs(
+                (prev_x - avg_x) * (point[1] - prev_y) -
+                (prev_x - point[0]) * (avg_y - prev_y)
+            ),
+        )
+        sampled.append(previous)
+    sampled.append(points[-1])
+    return sampled
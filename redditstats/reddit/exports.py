@@ -0,0 +1,162 @@
+"""Stream posts, comments and their snapshots out of the database."""
+import csv
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover
+    pyarrow = None
+
+from .models import Comment, CommentSnapshot, Post, PostSnapshot
+
+
+Export = namedtuple('Export', ['model', 'fields', 'subreddit_lookup'])
+
+EXPORTS = {
+    'posts': Export(
+        Post,
+        ['id', 'api_id', 'subreddit__name', 'author__username', 'created',
+         'permalink', 'url', 'title'],
+        'subreddit__name',
+    ),
+    'comments': Export(
+        Comment,
+        ['id', 'api_id', 'post_id', 'parent_id', 'author__username',
+         'created', 'permalink', 'depth'],
+        'post__subreddit__name',
+    ),
+    'post_snapshots': Export(
+        PostSnapshot,
+        ['id', 'post_id', 'created', 'score', 'ups', 'downs',
+         'comment_count'],
+        'post__subreddit__name',
+    ),
+    'comment_snapshots': Export(
+        CommentSnapshot,
+        ['id', 'comment_id', 'created', 'score', 'ups', 'downs'],
+        'comment__post__subreddit__name',
+    ),
+}
+FORMATS = ['ndjson', 'csv', 'parquet']
+# The number of rows buffered before they're written out.
+CHUNK_SIZE = 10000
+
+
+def _rows(kind, subreddit=None, since=None, until=None, after_id=None):
+    export = EXPORTS[kind]
+    queryset = export.model.objects.all()
+    if subreddit:
+        queryset = queryset.filter(**{export.subreddit_lookup: subreddit})
+    if since:
+        queryset = queryset.filter(created__gte=since)
+    if until:
+        queryset = queryset.filter(created__lt=until)
+    if after_id:
+        queryset = queryset.filter(id__gt=after_id)
+    # iterator() reads through a server-side cursor on PostgreSQL.
+    return queryset.order_by('id').values_list(*export.fields).iterator()
+
+
+def _chunks(rows):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _names(export):
+    return [field.replace('__', '_') for field in export.fields]
+
+
+def _model_field(model, lookup):
+    """Return the model field the values of ``lookup`` come from."""
+    *relations, name = lookup.split('__')
+    for relation in relations:
+        model = model._meta.get_field(relation).related_model
+    field = model._meta.get_field(name)
+    # A foreign key holds the value of the field it points to.
+    return field.target_field if field.is_relation else field
+
+
+def _arrow_schema(export):
+    """
+    Return the Arrow schema of the export, from the model fields rather than
+    the values, whose types can't be inferred from a column of nulls.
+    """
+    types = {
+        'AutoField': pyarrow.int64(),
+        'IntegerField': pyarrow.int64(),
+        'BooleanField': pyarrow.bool_(),
+        'CharField': pyarrow.string(),
+        'TextField': pyarrow.string(),
+        'DateTimeField': pyarrow.timestamp('us', tz='UTC'),
+    }
+    return pyarrow.schema([
+        pyarrow.field(name, types[
+            _model_field(export.model, lookup).get_internal_type()])
+        for name, lookup in zip(_names(export), export.fields)
+    ])
+
+
+def _write_ndjson(out, export, chunks):
+    fields = _names(export)
+    encoder = DjangoJSONEncoder()
+    for chunk in chunks:
+        out.writelines(
+            encoder.encode(dict(zip(fields, row))) + '\n' for row in chunk)
+        yield chunk
+
+
+def _write_csv(out, export, chunks):
+    writer = csv.writer(out)
+    writer.writerow(_names(export))
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield chunk
+
+
+def _write_parquet(out, export, chunks):
+    schema = _arrow_schema(export)
+    writer = pyarrow.parquet.ParquetWriter(out, schema)
+    try:
+        for chunk in chunks:
+            writer.write_table(pyarrow.Table.from_arrays([
+                pyarrow.array(column, type=field.type)
+                for column, field in zip(zip(*chunk), schema)
+            ], schema=schema))
+            yield chunk
+    finally:
+        writer.close()
+
+
+WRITERS = {
+    'ndjson': _write_ndjson,
+    'csv': _write_csv,
+    'parquet': _write_parquet,
+}
+
+
+def export(kind, out, format='ndjson', **filters):
+    """
+    Write the rows of ``kind`` to ``out`` in ``format``, oldest first.
+
+    Rows are read through a cursor and written in chunks of CHUNK_SIZE,
+    so memory use doesn't grow with the size of the export. ``out`` is a
+    text file for ndjson and csv and a binary file for parquet.
+
+    Returns the id of the last row written, to be passed as ``after_id``
+    to continue the export later.
+    """
+    last_id = filters.get('after_id')
+    chunks = WRITERS[format](
+        out, EXPORTS[kind], _chunks(_rows(kind, **filters)))
+    for chunk in chunks:
+        last_id = chunk[-1][0]
+    return last_id
@@ -0,0 +1,131 @@
+"""Keep ingesting data from Reddit in a long running process."""
+import logging
+import os
+import signal
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from .actions import fetch_subreddit, refresh_data, trim_data
+from .client import reddit
+from .leaderboards import update_user_totals
+from .models import Subreddit
+from .publishing import publish_dashboard
+from .trending import update_trending
+
+logger = logging.getLogger(__name__)
+# How often the heartbeat is written, in seconds.
+HEARTBEAT_SECONDS = 30
+# After a refresh, the dashboard is only published again once the data has
+# been ingested this many seconds past the published page.
+REFRESH_PUBLISH_SECONDS = 15 * 60
+
+
+class Job(object):
+    def __init__(self, name, interval, func):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.next_run = 0
+
+
+class Ingestor(object):
+    """
+    Run fetches, refreshes and trims on their own intervals.
+
+    The Reddit client, the user cache and the database connection are kept
+    between runs. After SIGTERM or SIGINT the current batch is finished
+    before the ingestor stops.
+    """
+
+    def __init__(self, fetch_interval, refresh_interval, trim_interval,
+                 heartbeat=None):
+        self.client = reddit()
+        self.heartbeat = heartbeat
+        self.published = None
+        self.stopping = threading.Event()
+        self.jobs = [
+            Job('fetch', fetch_interval, self.fetch),
+            Job('refresh', refresh_interval, self.refresh),
+            Job('trim', trim_interval, trim_data),
+        ]
+
+    def stop(self, signum=None, frame=None):
+        self.stopping.set()
+
+    def beat(self):
+        """Record that the ingestor is alive by writing the time to a file."""
+        temp = f'{self.heartbeat}.tmp'
+        with open(temp, 'w') as f:
+            f.write(timezone.now().isoformat())
+        os.replace(temp, self.heartbeat)
+
+    def beat_forever(self):
+        """
+        Write the heartbeat every HEARTBEAT_SECONDS, so it keeps being
+        written during long jobs.
+        """
+        while not self.stopping.is_set():
+            try:
+                self.beat()
+            except OSError:
+                logger.exception('Writing the heartbeat failed.')
+            self.stopping.wait(HEARTBEAT_SECONDS)
+
+    def fetch(self):
+        for subreddit in Subreddit.objects.iterator():
+            if self.stopping.is_set():
+                return
+            fetch_subreddit(self.client, subreddit)
+        update_trending()
+        update_user_totals()
+        self.publish()
+
+    def refresh(self):
+        refresh_data(self.client)
+        update_trending()
+        update_user_totals()
+        self.publish(REFRESH_PUBLISH_SECONDS)
+
+    def publish(self, min_seconds=0):
+        """
+        Publish the dashboard if data was ingested at least ``min_seconds``
+        after the last time it was.
+        """
+        if not settings.PUBLISH_DASHBOARD:
+            return
+        ingested = Subreddit.objects.aggregate(
+            ingested=Max('ingested'))['ingested']
+        if (self.published and ingested and
+                (ingested - self.published).total_seconds() < min_seconds):
+            return
+        publish_dashboard()
+        self.published = ingested
+
+    def run_job(self, job):
+        # Keep the connection open between jobs unless it has broken.
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+        try:
+            job.func()
+        except Exception:
+            logger.exception('The %s job failed.', job.name)
+        job.next_run = time.monotonic() + job.interval
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if self.heartbeat:
+            threading.Thread(target=self.beat_forever, daemon=True).start()
+        while not self.stopping.is_set():
+            for job in self.jobs:
+                if self.stopping.is_set():
+                    break
+                if job.next_run <= time.monotonic():
+                    self.run_job(job)
+            wait = min(job.next_run for job in self.jobs) - time.monotonic()
+            self.stopping.wait(max(wait, 0))
@@ -0,0 +1,67 @@
+"""Roll up what users posted and commented each day for the leaderboards."""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+import pytz
+
+from .models import Comment, Post, UserTotal
+
+# The leaderboards cover the week before today, and today.
+DAYS = 7
+# The top level comments of the daily Q&A, and the answers to them.
+QUESTION = Q(parent__isnull=True, is_qa_thread=True, author_is_bot=False)
+ANSWER = Q(
+    parent__isnull=False, depth=1, is_qa_thread=True, author_is_bot=False)
+
+
+def _count(condition):
+    return Sum(Case(
+        When(condition, then=Value(1)), default=Value(0),
+        output_field=IntegerField()))
+
+
+def _score(condition):
+    return Sum(Case(
+        When(condition, then='score'), default=Value(0),
+        output_field=IntegerField()))
+
+
+def _daily(queryset, **totals):
+    """Return the ``totals`` of the queryset per subreddit, day and author."""
+    return queryset.filter(author__isnull=False).annotate(
+        day=TruncDate('created'),
+    ).order_by().values('subreddit', 'day', 'author').annotate(**totals)
+
+
+def update_user_totals(now=None):
+    """
+    Rebuild the user totals of the days the leaderboards cover, so the
+    leaderboards sum a few rows per user instead of their every comment.
+    """
+    now = now or timezone.now()
+    since = now.date() - timedelta(days=DAYS)
+    start = pytz.UTC.localize(datetime.combine(since, time.min))
+    totals = defaultdict(dict)
+    posts = _daily(
+        Post.objects.filter(created__gte=start),
+        posts=Count('id'), post_score=Sum('refreshed_score'))
+    comments = _daily(
+        Comment.objects.filter(created__gte=start, subreddit__isnull=False),
+        comments=Count('id'), comment_score=Sum('score'),
+        questions=_count(QUESTION), question_score=_score(QUESTION),
+        answers=_count(ANSWER), answer_score=_score(ANSWER))
+    for row in list(posts) + list(comments):
+        key = (row.pop('subreddit'), row.pop('day'), row.pop('author'))
+        # Scores are null until the first refresh.
+        totals[key].update((field, value or 0) for field, value in row.items())
+    with transaction.atomic():
+        UserTotal.objects.filter(day__gte=since).delete()
+        UserTotal.objects.bulk_create(
+            UserTotal(subreddit_id=subreddit, day=day, author_id=author,
+                      **fields)
+            for (subreddit, day, author), fields in totals.items())
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ...models import AuthorSketch, Comment, Subreddit
+from ...sketches import add_authors
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the unique author sketches from the stored data.'
+
+    def handle(self, **options):
+        for subreddit in Subreddit.objects.iterator():
+            with transaction.atomic():
+                AuthorSketch.objects.filter(subreddit=subreddit).delete()
+                add_authors(
+                    subreddit,
+                    subreddit.posts.all(),
+                    Comment.objects.filter(subreddit=subreddit),
+                )
@@ -0,0 +1,73 @@
+import sys
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from ... import exports
+
+
+def _datetime(value):
+    """Parse a date or datetime, treating naive values as UTC."""
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise ValueError(value)
+        parsed = datetime.combine(date, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed, timezone.utc)
+    return parsed
+
+
+class Command(BaseCommand):
+    help = 'Export posts, comments or their snapshots.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(exports.EXPORTS))
+        parser.add_argument(
+            '--format', choices=exports.FORMATS, default='ndjson')
+        parser.add_argument(
+            '--output', default='-',
+            help='The file to write to, defaults to stdout. Parquet '
+                 'exports require a file and the pyarrow package.')
+        parser.add_argument('--subreddit', help='The subreddit name.')
+        parser.add_argument(
+            '--since', type=_datetime,
+            help='Only export rows created at or after this time.')
+        parser.add_argument(
+            '--until', type=_datetime,
+            help='Only export rows created before this time.')
+        parser.add_argument(
+            '--after-id', type=int,
+            help='Only export rows after this id, the watermark reported '
+                 'by a previous export.')
+
+    def handle(self, **options):
+        output = options['output']
+        if options['format'] == 'parquet':
+            if exports.pyarrow is None:
+                raise CommandError(
+                    'pyarrow is required to export to parquet.')
+            if output == '-':
+                raise CommandError('Parquet exports require --output.')
+        filters = {
+            'subreddit': options['subreddit'],
+            'since': options['since'],
+            'until': options['until'],
+            'after_id': options['after_id'],
+        }
+        if output == '-':
+            out = sys.stdout
+        elif options['format'] == 'parquet':
+            out = open(output, 'wb')
+        else:
+            out = open(output, 'w', newline='')
+        try:
+            last_id = exports.export(
+                options['kind'], out, options['format'], **filters)
+        finally:
+            if out is not sys.stdout:
+                out.close()
+        self.stderr.write(f'Watermark: {last_id}')
@@ -1,10 +1,27 @@
+from django.conf import settings
 from django.core.management.base import BaseCommand
 
-from ...actions import fetch_data
+from ...actions import fetch_data, refresh_data
+from ...leaderboards import update_user_totals
+from ...publishing import publish_dashboard
+from ...trending import update_trending
 
 
 class Command(BaseCommand):
     help = 'Fetch post data from Reddit.'
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--refresh', action='store_true',
+            help='Only refresh the scores of posts and comments already '
+                 'stored that are due a refresh.')
+
     def handle(self, **options):
-        fetch_data()
+        if options['refresh']:
+            refresh_data()
+        else:
+            fetch_data()
+        update_trending()
+        update_user_totals()
+        if settings.PUBLISH_DASHBOARD:
+            publish_dashboard()
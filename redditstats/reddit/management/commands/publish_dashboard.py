@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ...publishing import publish_dashboard
+
+
+class Command(BaseCommand):
+    help = 'Publish the dashboard as a static page.'
+
+    def handle(self, **options):
+        publish_dashboard()
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from ...ingestor import Ingestor
+
+
+class Command(BaseCommand):
+    help = 'Keep fetching, refreshing and trimming data from Reddit.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fetch-interval', type=int, default=5 * 60,
+            help='Seconds between fetches of new posts.')
+        parser.add_argument(
+            '--refresh-interval', type=int, default=60,
+            help='Seconds between refreshes of due posts.')
+        parser.add_argument(
+            '--trim-interval', type=int, default=24 * 60 * 60,
+            help='Seconds between trims of the snapshots.')
+        parser.add_argument(
+            '--heartbeat',
+            help='A file the time is written to while the ingestor runs.')
+
+    def handle(self, **options):
+        ingestor = Ingestor(
+            fetch_interval=options['fetch_interval'],
+            refresh_interval=options['refresh_interval'],
+            trim_interval=options['trim_interval'],
+            heartbeat=options['heartbeat'],
+        )
+        ingestor.run()
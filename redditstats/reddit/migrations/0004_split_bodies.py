@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:01
+from __future__ import unicode_literals
+
+import zlib
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def restore_bodies(apps, schema_editor):
+    for model_name in ['Post', 'Comment']:
+        model = apps.get_model('reddit', model_name)
+        body_model = apps.get_model('reddit', model_name + 'Body')
+        for body in body_model.objects.iterator():
+            html = body.raw_html
+            if body.compressed_html is not None:
+                html = zlib.decompress(
+                    bytes(body.compressed_html)).decode('utf-8')
+            model.objects.filter(pk=body.pk).update(text=body.text, html=html)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0003_subreddit_moderators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentBody',
+            fields=[
+                ('text', models.TextField(blank=True, null=True)),
+                ('raw_html', models.TextField(blank=True, null=True)),
+                ('compressed_html', models.BinaryField(blank=True, null=True)),
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='reddit.Comment')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PostBody',
+            fields=[
+                ('text', models.TextField(blank=True, null=True)),
+                ('raw_html', models.TextField(blank=True, null=True)),
+                ('compressed_html', models.BinaryField(blank=True, null=True)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='body', serialize=False, to='reddit.Post')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.RunSQL(
+            'INSERT INTO reddit_postbody (post_id, text, raw_html) '
+            'SELECT id, text, html FROM reddit_post',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'INSERT INTO reddit_commentbody (comment_id, text, raw_html) '
+            'SELECT id, text, html FROM reddit_comment',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunPython(migrations.RunPython.noop, restore_bodies),
+        migrations.RemoveField(
+            model_name='comment',
+            name='html',
+        ),
+        migrations.RemoveField(
+            model_name='comment',
+            name='text',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='html',
+        ),
+        migrations.RemoveField(
+            model_name='post',
+            name='text',
+        ),
+        migrations.AlterField(
+            model_name='subreddit',
+            name='moderators',
+            field=models.ManyToManyField(blank=True, related_name='moderates', to='reddit.User'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:06
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0005_post_refresh_schedule'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='commentsnapshot',
+            index=models.Index(fields=['comment', 'created'], name='reddit_comm_comment_81102b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='postsnapshot',
+            index=models.Index(fields=['post', 'created'], name='reddit_post_post_id_27dd15_idx'),
+        ),
+    ]
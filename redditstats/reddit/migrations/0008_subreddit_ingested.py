@@ -0,0 +1,20 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:13
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0007_created_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subreddit',
+            name='ingested',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
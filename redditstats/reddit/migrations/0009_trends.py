@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:15
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0008_subreddit_ingested'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CommentTrend',
+            fields=[
+                ('score', models.IntegerField()),
+                ('gained', models.DateTimeField()),
+                ('heat', models.FloatField(default=0)),
+                ('comment', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='reddit.Comment')),
+                ('subreddit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reddit.Subreddit')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='PostTrend',
+            fields=[
+                ('score', models.IntegerField()),
+                ('gained', models.DateTimeField()),
+                ('heat', models.FloatField(default=0)),
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trend', serialize=False, to='reddit.Post')),
+                ('subreddit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reddit.Subreddit')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendWatermark',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('post_snapshot', models.IntegerField(default=0)),
+                ('comment_snapshot', models.IntegerField(default=0)),
+                ('updated', models.DateTimeField(blank=True, null=True)),
+                ('epoch', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='posttrend',
+            index=models.Index(fields=['subreddit', 'heat'], name='reddit_post_subredd_8a3113_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='commenttrend',
+            index=models.Index(fields=['subreddit', 'heat'], name='reddit_comm_subredd_7b5124_idx'),
+        ),
+    ]
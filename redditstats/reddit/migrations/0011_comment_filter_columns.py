@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:19
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0010_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='author_is_bot',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='is_qa_thread',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='subreddit',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='comments', to='reddit.Subreddit'),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['subreddit', 'is_qa_thread', 'created'], name='reddit_comm_subredd_32ae70_idx'),
+        ),
+    ]
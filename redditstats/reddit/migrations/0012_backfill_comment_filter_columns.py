@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0011_comment_filter_columns'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'UPDATE reddit_comment SET subreddit_id = ('
+            'SELECT subreddit_id FROM reddit_post '
+            'WHERE reddit_post.id = reddit_comment.post_id)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            [(
+                'UPDATE reddit_comment SET is_qa_thread = %s '
+                'WHERE post_id IN ('
+                'SELECT reddit_post.id FROM reddit_post '
+                'INNER JOIN reddit_user '
+                'ON reddit_user.id = reddit_post.author_id '
+                'WHERE reddit_user.username = %s '
+                'AND reddit_post.title LIKE %s)',
+                [True, 'AutoModerator', 'Daily Q & A!%'],
+            )],
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            [(
+                'UPDATE reddit_comment SET author_is_bot = %s '
+                'WHERE author_id IN ('
+                'SELECT id FROM reddit_user WHERE username = %s)',
+                [True, 'AutoModerator'],
+            )],
+            migrations.RunSQL.noop,
+        ),
+    ]
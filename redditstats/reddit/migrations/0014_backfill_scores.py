@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0013_comment_score'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            'UPDATE reddit_comment SET score = ('
+            'SELECT score FROM reddit_commentsnapshot '
+            'WHERE reddit_commentsnapshot.comment_id = reddit_comment.id '
+            'ORDER BY created DESC, id DESC LIMIT 1)',
+            migrations.RunSQL.noop,
+        ),
+        migrations.RunSQL(
+            'UPDATE reddit_post SET refreshed_score = ('
+            'SELECT score FROM reddit_postsnapshot '
+            'WHERE reddit_postsnapshot.post_id = reddit_post.id '
+            'ORDER BY created DESC, id DESC LIMIT 1) '
+            'WHERE refreshed_score IS NULL',
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:23
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0014_backfill_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorSketch',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('posters', models.BinaryField(blank=True, null=True)),
+                ('commenters', models.BinaryField(blank=True, null=True)),
+                ('subreddit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='author_sketches', to='reddit.Subreddit')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='authorsketch',
+            unique_together=set([('subreddit', 'day')]),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 1.11.4 on 2026-10-19 16:48
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reddit', '0015_author_sketches'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTotal',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('posts', models.IntegerField(default=0)),
+                ('post_score', models.IntegerField(default=0)),
+                ('comments', models.IntegerField(default=0)),
+                ('comment_score', models.IntegerField(default=0)),
+                ('questions', models.IntegerField(default=0)),
+                ('question_score', models.IntegerField(default=0)),
+                ('answers', models.IntegerField(default=0)),
+                ('answer_score', models.IntegerField(default=0)),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reddit.User')),
+                ('subreddit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='reddit.Subreddit')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='usertotal',
+            unique_together=set([('subreddit', 'day', 'author')]),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import zlib
+
+from django.conf import settings
 from django.db import models
 from django.template.defaultfilters import truncatechars
 
@@ -14,6 +17,8 @@ class Subreddit(models.Model):
     name = models.CharField(max_length=255)
     moderators = models.ManyToManyField(
         User, related_name='moderates', blank=True)
+    # When posts or snapshots were last written for the subreddit.
+    ingested = models.DateTimeField(null=True, blank=True)
 
     def __str__(self):
         return self.name
@@ -27,8 +32,12 @@ class Post(models.Model):
     permalink = models.CharField(max_length=255)
     url = models.URLField(null=True, blank=True)
     title = models.CharField(max_length=511)
-    text = models.TextField(null=True, blank=True)
-    html = models.TextField(null=True, blank=True)
+    refreshed = models.DateTimeField(null=True, blank=True)
+    refreshed_score = models.IntegerField(null=True, blank=True)
+    next_refresh = models.DateTimeField(null=True, blank=True, db_index=True)
+    # A digest of the title, links and body, to skip rewriting unchanged posts.
+    content_hash = models.CharField(max_length=16, null=True, blank=True)
+    edited = models.DateTimeField(null=True, blank=True)
 
     @property
     def short_title(self):
@@ -42,14 +51,56 @@ class Post(models.Model):
         return self.short_title
 
 
+class Body(models.Model):
+    """
+    The markdown and rendered HTML of a post or comment.
+
+    Bodies live in their own tables so the rows scanned by the leaderboard
+    queries stay small. When ``COMPRESS_BODY_HTML`` is set the HTML is
+    stored zlib compressed.
+    """
+    text = models.TextField(null=True, blank=True)
+    raw_html = models.TextField(null=True, blank=True)
+    compressed_html = models.BinaryField(null=True, blank=True)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def html(self):
+        if self.compressed_html is not None:
+            return zlib.decompress(bytes(self.compressed_html)).decode('utf-8')
+        return self.raw_html
+
+    @html.setter
+    def html(self, value):
+        if value is not None and settings.COMPRESS_BODY_HTML:
+            self.raw_html = None
+            self.compressed_html = zlib.compress(value.encode('utf-8'))
+        else:
+            self.raw_html = value
+            self.compressed_html = None
+
+
+class PostBody(Body):
+    post = models.OneToOneField(
+        Post, related_name='body', primary_key=True)
+
+    def __str__(self):
+        return str(self.post)
+
+
 class PostSnapshot(models.Model):
     post = models.ForeignKey(Post, related_name='snapshots')
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     score = models.IntegerField()
     ups = models.IntegerField()
     downs = models.IntegerField()
     comment_count = models.IntegerField()
 
+    class Meta:
+        indexes = [models.Index(fields=['post', 'created'])]
+
     def __str__(self):
         return f'{self.ups}'
 
@@ -57,14 +108,29 @@ class PostSnapshot(models.Model):
 class Comment(models.Model):
     post = models.ForeignKey(Post, related_name='comments')
     author = models.ForeignKey(User, related_name='comments', null=True, blank=True)
-    created = models.DateTimeField()
+    created = models.DateTimeField(db_index=True)
     api_id = models.CharField(max_length=64, unique=True)
     permalink = models.CharField(max_length=255)
     depth = models.IntegerField()
     parent = models.ForeignKey(
         'self', related_name='children', null=True, blank=True)
-    text = models.TextField(null=True, blank=True)
-    html = models.TextField(null=True, blank=True)
+    content_hash = models.CharField(max_length=16, null=True, blank=True)
+    edited = models.DateTimeField(null=True, blank=True)
+    # Copied from the post and author when ingested, so the leaderboards
+    # filter comments without joining them.
+    subreddit = models.ForeignKey(
+        Subreddit, related_name='comments', null=True, blank=True)
+    is_qa_thread = models.BooleanField(default=False)
+    author_is_bot = models.BooleanField(default=False)
+    # The score of the latest snapshot.
+    score = models.IntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['subreddit', 'is_qa_thread', 'created']),
+            models.Index(fields=['subreddit', 'score']),
+            models.Index(fields=['subreddit', 'is_qa_thread', 'score']),
+        ]
 
     @property
     def reddit_link(self):
@@ -74,12 +140,119 @@ class Comment(models.Model):
         return self.api_id
 
 
+class CommentBody(Body):
+    comment = models.OneToOneField(
+        Comment, related_name='body', primary_key=True)
+
+    def __str__(self):
+        return str(self.comment)
+
+
 class CommentSnapshot(models.Model):
     comment = models.ForeignKey(Comment, related_name='snapshots')
-    created = models.DateTimeField(auto_now_add=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
     score = models.IntegerField()
     ups = models.IntegerField()
     downs = models.IntegerField()
 
+    class Meta:
+        indexes = [models.Index(fields=['comment', 'created'])]
+
     def __str__(self):
         return f'{self.ups}'
+
+
+class Trend(models.Model):
+    """
+    The recent score gains of a post or comment, kept by the trending
+    engine for as long as it keeps gaining.
+
+    ``heat`` is the sum of the score gains seen in snapshots, each doubled
+    for every ``settings.TRENDING['HALF_LIFE']`` it came after the epoch
+    of the TrendWatermark. Ordering by it ranks what is rising now without
+    ever cooling the rows, see trending.py.
+    """
+    subreddit = models.ForeignKey(Subreddit, related_name='+')
+    score = models.IntegerField()
+    # When the score last went up.
+    gained = models.DateTimeField()
+    heat = models.FloatField(default=0)
+
+    class Meta:
+        abstract = True
+        indexes = [models.Index(fields=['subreddit', 'heat'])]
+
+
+class PostTrend(Trend):
+    post = models.OneToOneField(
+        Post, related_name='trend', primary_key=True)
+
+    class Meta(Trend.Meta):
+        pass
+
+    def __str__(self):
+        return str(self.post)
+
+
+class CommentTrend(Trend):
+    comment = models.OneToOneField(
+        Comment, related_name='trend', primary_key=True)
+
+    class Meta(Trend.Meta):
+        pass
+
+    def __str__(self):
+        return str(self.comment)
+
+
+class TrendWatermark(models.Model):
+    """
+    The last snapshots and time the trending engine consumed, and the
+    epoch the heat of the trends is relative to.
+    """
+    post_snapshot = models.IntegerField(default=0)
+    comment_snapshot = models.IntegerField(default=0)
+    updated = models.DateTimeField(null=True, blank=True)
+    epoch = models.DateTimeField(null=True, blank=True)
+
+
+class AuthorSketch(models.Model):
+    """
+    HyperLogLog registers of the authors who posted and commented in a
+    subreddit on a day. Merging the sketches of a range of days estimates
+    its unique authors, see sketches.py.
+    """
+    subreddit = models.ForeignKey(Subreddit, related_name='author_sketches')
+    day = models.DateField()
+    posters = models.BinaryField(null=True, blank=True)
+    commenters = models.BinaryField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('subreddit', 'day')
+
+    def __str__(self):
+        return f'{self.subreddit} {self.day}'
+
+
+class UserTotal(models.Model):
+    """
+    What a user posted and commented in a subreddit on a day, and the
+    scores it got, rolled up for the leaderboards, see leaderboards.py.
+    """
+    subreddit = models.ForeignKey(Subreddit, related_name='+')
+    author = models.ForeignKey(User, related_name='+')
+    day = models.DateField()
+    posts = models.IntegerField(default=0)
+    post_score = models.IntegerField(default=0)
+    comments = models.IntegerField(default=0)
+    comment_score = models.IntegerField(default=0)
+    questions = models.IntegerField(default=0)
+    question_score = models.IntegerField(default=0)
+    answers = models.IntegerField(default=0)
+    answer_score = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('subreddit', 'day', 'author')
+
+    def __str__(self):
+        return f'{self.author} {self.subreddit} {self.day}'
@@ -0,0 +1,98 @@
+"""Expand the collapsed comment threads of a submission within a budget."""
+import itertools
+import queue
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from heapq import heappop, heappush
+
+from praw.models import MoreComments
+
+from .client import reddit
+
+# Idle clients for the workers. PRAW clients aren't thread-safe, so each
+# request takes a client of its own, and they're kept for the next post.
+_clients = queue.LifoQueue()
+
+
+def _expand(more):
+    """Load the comments of ``more`` with a client no other thread uses."""
+    try:
+        client = _clients.get_nowait()
+    except queue.Empty:
+        client = reddit()
+    try:
+        more._reddit = client
+        return more.comments()
+    finally:
+        _clients.put(client)
+
+
+def _priority(more, comments, submission):
+    """Sort the highest scoring, then deepest, then largest branches first."""
+    parent = comments.get(more.parent_id)
+    if parent is None:
+        return (-submission.score, 0, -more.count)
+    return (-parent.score, -(parent.depth + 1), -more.count)
+
+
+def expand_comments(submission, max_requests, max_seconds, workers):
+    """
+    Return all comments of a submission, parents before their replies.
+
+    ``MoreComments`` are expanded by up to ``workers`` concurrent
+    requests until ``max_requests`` requests have been made or
+    ``max_seconds`` have passed, after which the requests in flight are
+    waited for and their comments kept. PRAW clients can't be shared
+    between threads, so each request is made with a client no other
+    request is using, whose rate limiter follows the limits Reddit reports.
+    "Continue this thread" links are skipped because the comments they
+    load report their depth relative to the thread.
+    """
+    comments = {}
+    queue = []
+    counter = itertools.count()
+
+    def gather(items):
+        stack = list(items)
+        found = []
+        while stack:
+            item = stack.pop()
+            if isinstance(item, MoreComments):
+                if item.count:
+                    found.append(item)
+            else:
+                comments[item.name] = item
+                stack.extend(item.replies)
+        for more in found:
+            more.submission = submission
+            heappush(queue, (
+                _priority(more, comments, submission), next(counter), more))
+
+    gather(submission.comments)
+    deadline = time.monotonic() + max_seconds
+    executor = ThreadPoolExecutor(max_workers=workers)
+    pending = {}
+    try:
+        while queue or pending:
+            while queue and len(pending) < workers and max_requests > 0:
+                _, _, more = heappop(queue)
+                pending[executor.submit(_expand, more)] = more
+                max_requests -= 1
+            if not pending:
+                break
+            done, _ = wait(
+                pending, timeout=max(deadline - time.monotonic(), 0),
+                return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                del pending[future]
+                gather(future.result())
+    finally:
+        # Requests still in flight are finished rather than left running
+        # into the next submission's budget.
+        executor.shutdown(wait=True)
+    for future in pending:
+        if future.exception() is None:
+            gather(future.result())
+    return sorted(comments.values(), key=lambda comment: comment.depth)
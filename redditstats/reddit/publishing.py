@@ -0,0 +1,47 @@
+"""Publish the dashboard as a static page after each ingest."""
+import os
+import tempfile
+
+from django.conf import settings
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from .views import Dashboard
+
+
+def render_view(view_class, url, **kwargs):
+    """
+    Render a view without its dispatch decorators, so neither the fragment
+    cache nor the replica are used.
+    """
+    request = RequestFactory().get(url)
+    view = view_class()
+    view.request = request
+    view.args = ()
+    view.kwargs = kwargs
+    response = view.get(request, **kwargs)
+    response.render()
+    return response.content.decode(response.charset)
+
+
+def render_partial(name):
+    """Render the partial view with the url name ``name``."""
+    url = reverse(name)
+    return render_view(resolve(url).func.view_class, url)
+
+
+def publish_dashboard():
+    """
+    Render the dashboard with its partials inlined to
+    PUBLISH_ROOT/index.html, replacing the previous page atomically. It's
+    rendered from the primary, as the replica may not have the ingest yet.
+    """
+    html = render_view(Dashboard, reverse('dashboard'), inline_partials=True)
+    os.makedirs(settings.PUBLISH_ROOT, exist_ok=True)
+    fd, temp = tempfile.mkstemp(dir=settings.PUBLISH_ROOT, suffix='.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(html)
+    os.chmod(temp, 0o644)
+    path = os.path.join(settings.PUBLISH_ROOT, 'index.html')
+    os.replace(temp, path)
+    return path
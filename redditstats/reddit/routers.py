@@ -0,0 +1,73 @@
+"""Route the dashboard's reads to a replica of the database."""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+_local = threading.local()
+# How long a replica lag measurement is trusted for, in seconds.
+LAG_CHECK_SECONDS = 10
+
+
+@contextmanager
+def use_replica():
+    """Send the reads made within the block to the replica if possible."""
+    previous = getattr(_local, 'use_replica', False)
+    _local.use_replica = True
+    try:
+        yield
+    finally:
+        _local.use_replica = previous
+
+
+def replica_lag(alias):
+    """Return how many seconds the replica is behind the primary."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT COALESCE(EXTRACT(EPOCH FROM '
+            'now() - pg_last_xact_replay_timestamp()), 0)')
+        return cursor.fetchone()[0]
+
+
+def replica_available():
+    """
+    Return whether the replica is configured and, when REPLICA_MAX_LAG is
+    set, close enough to the primary to read from.
+    """
+    alias = settings.REPLICA_DATABASE
+    if alias not in settings.DATABASES:
+        return False
+    if settings.REPLICA_MAX_LAG is None:
+        return True
+    now = time.monotonic()
+    if now - getattr(_local, 'lag_checked', -LAG_CHECK_SECONDS) >= LAG_CHECK_SECONDS:
+        try:
+            _local.lag = replica_lag(alias)
+        except DatabaseError:
+            _local.lag = None
+        _local.lag_checked = now
+    return _local.lag is not None and _local.lag <= settings.REPLICA_MAX_LAG
+
+
+class ReplicaRouter(object):
+    """
+    Read from the replica inside use_replica() and from the primary
+    everywhere else. All writes go to the primary, so ingestion and
+    trimming never touch the replica.
+    """
+
+    def db_for_read(self, model, **hints):
+        if getattr(_local, 'use_replica', False) and replica_available():
+            return settings.REPLICA_DATABASE
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
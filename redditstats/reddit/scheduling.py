@@ -0,0 +1,41 @@
+"""Decide when a post's score should next be refreshed."""
+from datetime import timedelta
+
+
+# (maximum post age, refresh interval) pairs, youngest first. Posts older
+# than the last age are no longer refreshed.
+REFRESH_INTERVALS = [
+    (timedelta(hours=1), timedelta(minutes=10)),
+    (timedelta(hours=6), timedelta(minutes=30)),
+    (timedelta(days=1), timedelta(hours=1)),
+    (timedelta(days=3), timedelta(hours=6)),
+    (timedelta(days=7), timedelta(days=1)),
+]
+MIN_INTERVAL = timedelta(minutes=5)
+# The change in score per hour that halves a post's refresh interval.
+VELOCITY_SCALE = 20
+
+
+def velocity(score, previous_score, elapsed):
+    """Return the change in score per hour since the previous refresh."""
+    if previous_score is None or not elapsed:
+        return 0
+    return (score - previous_score) / (elapsed.total_seconds() / 3600)
+
+
+def next_refresh(created, now, rate=0):
+    """
+    Return when a post created at ``created`` should next be refreshed,
+    or None when it's too old to be refreshed again.
+
+    Young posts are refreshed more often than old ones, and posts whose
+    score is moving quickly more often than ones that have settled.
+    """
+    age = now - created
+    for max_age, interval in REFRESH_INTERVALS:
+        if age < max_age:
+            break
+    else:
+        return None
+    interval = interval / (1 + abs(rate) / VELOCITY_SCALE)
+    return now + max(interval, MIN_INTERVAL)
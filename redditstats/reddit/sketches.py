@@ -0,0 +1,107 @@
+"""Estimate unique authors over any range of days with HyperLogLog."""
+from collections import defaultdict
+
+from django.db import transaction
+
+import numpy as np
+
+from .models import AuthorSketch
+
+# Each sketch has 2 ** PRECISION one byte registers, for a standard error
+# of about 1.6%.
+PRECISION = 12
+REGISTERS = 1 << PRECISION
+ALPHA = 0.7213 / (1 + 1.079 / REGISTERS)
+# The number of authors hashed at a time.
+BATCH_SIZE = 10000
+
+
+def _hash(values):
+    """Return a well mixed 64 bit hash of each integer, after splitmix64."""
+    x = np.asarray(values, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def registers(data):
+    """Return the registers stored in ``data``, or empty ones."""
+    if not data:
+        return np.zeros(REGISTERS, dtype=np.uint8)
+    return np.frombuffer(bytes(data), dtype=np.uint8).copy()
+
+
+def add(sketch, values):
+    """Add the integers ``values`` to the registers ``sketch`` in place."""
+    hashes = _hash(values)
+    index = (hashes >> np.uint64(64 - PRECISION)).astype(np.intp)
+    # The rank is the position of the first set bit in the low 32 bits.
+    low = (hashes & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    bits = np.where(
+        low > 0, np.floor(np.log2(np.maximum(low, 1))) + 1, 0)
+    np.maximum.at(sketch, index, (33 - bits).astype(np.uint8))
+    return sketch
+
+
+def merge(sketches):
+    """Return the registers of the union of the sketches."""
+    merged = np.zeros(REGISTERS, dtype=np.uint8)
+    for sketch in sketches:
+        np.maximum(merged, sketch, out=merged)
+    return merged
+
+
+def estimate(sketch):
+    """Return the estimated number of unique values added to ``sketch``."""
+    raw = ALPHA * REGISTERS ** 2 / np.sum(
+        np.power(2.0, -sketch.astype(np.float64)))
+    zeros = np.count_nonzero(sketch == 0)
+    if raw <= 2.5 * REGISTERS and zeros:
+        # Linear counting is more accurate for small cardinalities.
+        return int(round(REGISTERS * np.log(REGISTERS / zeros)))
+    return int(round(raw))
+
+
+def _add_batch(subreddit, sketches, field, authors):
+    """Add the ``authors`` of each day to the ``field`` of its sketch."""
+    for day, values in authors.items():
+        if day not in sketches:
+            sketches[day], _ = AuthorSketch.objects.select_for_update(
+            ).get_or_create(subreddit=subreddit, day=day)
+        sketch = sketches[day]
+        data = add(registers(getattr(sketch, field)), values)
+        setattr(sketch, field, data.tobytes())
+
+
+def add_authors(subreddit, posts, comments):
+    """
+    Add the authors of the ``posts`` and ``comments`` querysets to the
+    sketches of the days they were created on. The authors are read through
+    a cursor and hashed BATCH_SIZE at a time.
+    """
+    with transaction.atomic():
+        sketches = {}
+        for field, queryset in [('posters', posts), ('commenters', comments)]:
+            rows = queryset.filter(author__isnull=False).values_list(
+                'created', 'author')
+            authors = defaultdict(list)
+            for count, (created, author) in enumerate(rows.iterator(), 1):
+                authors[created.date()].append(author)
+                if count % BATCH_SIZE == 0:
+                    _add_batch(subreddit, sketches, field, authors)
+                    authors.clear()
+            _add_batch(subreddit, sketches, field, authors)
+        for sketch in sketches.values():
+            sketch.save()
+
+
+def unique_authors(subreddit, field, since, until=None):
+    """
+    Return the estimated number of unique ``field``, either ``posters`` or
+    ``commenters``, in the subreddit from the day ``since`` on.
+    """
+    sketches = AuthorSketch.objects.filter(subreddit=subreddit, day__gte=since)
+    if until:
+        sketches = sketches.filter(day__lte=until)
+    return estimate(merge(
+        registers(data) for data in sketches.values_list(field, flat=True)))
@@ -0,0 +1,82 @@
+import datetime
+
+from django import template
+from django.contrib.admin.templatetags.admin_list import date_hierarchy
+from django.db.models import Max, Min
+from django.utils import formats
+from django.utils.text import capfirst
+from django.utils.translation import ugettext as _
+
+register = template.Library()
+
+
+@register.inclusion_tag('admin/date_hierarchy.html')
+def keyset_date_hierarchy(cl):
+    """
+    Display the date hierarchy like the admin's own, but with the years,
+    months and days between the first and last dates in range rather than
+    those found by a DISTINCT over the whole table, so some may be empty.
+    """
+    if not cl.date_hierarchy:
+        return {}
+    field = cl.date_hierarchy
+    year_field = f'{field}__year'
+    month_field = f'{field}__month'
+    year = cl.params.get(year_field)
+    month = cl.params.get(month_field)
+    if cl.params.get(f'{field}__day'):
+        # A single day is shown without querying.
+        return date_hierarchy(cl)
+
+    def link(filters):
+        return cl.get_query_string(filters, [f'{field}__'])
+
+    queryset = cl.queryset
+    if year:
+        queryset = queryset.filter(**{year_field: year})
+    if year and month:
+        queryset = queryset.filter(**{month_field: month})
+    dates = queryset.aggregate(first=Min(field), last=Max(field))
+    first, last = dates['first'], dates['last']
+    if first is None:
+        return {'show': True, 'choices': []}
+    if not year and first.year == last.year:
+        year = first.year
+        if first.month == last.month:
+            month = first.month
+
+    if year and month:
+        days = [
+            datetime.date(int(year), int(month), day)
+            for day in range(first.day, last.day + 1)]
+        return {
+            'show': True,
+            'back': {'link': link({year_field: year}), 'title': str(year)},
+            'choices': [{
+                'link': link({
+                    year_field: year, month_field: month,
+                    f'{field}__day': day.day}),
+                'title': capfirst(formats.date_format(
+                    day, 'MONTH_DAY_FORMAT')),
+            } for day in days],
+        }
+    if year:
+        months = [
+            datetime.date(int(year), month, 1)
+            for month in range(first.month, last.month + 1)]
+        return {
+            'show': True,
+            'back': {'link': link({}), 'title': _('All dates')},
+            'choices': [{
+                'link': link({year_field: year, month_field: month.month}),
+                'title': capfirst(formats.date_format(
+                    month, 'YEAR_MONTH_FORMAT')),
+            } for month in months],
+        }
+    return {
+        'show': True,
+        'choices': [{
+            'link': link({year_field: str(year)}),
+            'title': str(year),
+        } for year in range(first.year, last.year + 1)],
+    }
@@ -0,0 +1,20 @@
+from django import template
+from django.urls import reverse
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from ..publishing import render_partial
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def partial(context, name):
+    """
+    Render the partial with the url name ``name`` inline when the page is
+    being published, otherwise load it once the page has loaded.
+    """
+    if context.get('inline_partials'):
+        return format_html('<div>{}</div>', mark_safe(render_partial(name)))
+    return format_html(
+        '<div class="remote-load" data-url="{}"></div>', reverse(name))
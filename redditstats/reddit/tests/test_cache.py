@@ -0,0 +1,95 @@
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from ..cache import _key, fragment_cache, local_cache
+
+
+@override_settings(CACHES={
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+})
+class FragmentCacheTests(SimpleTestCase):
+    url = '/partials/test/'
+
+    def setUp(self):
+        cache.clear()
+        local_cache.clear()
+        self.renders = 0
+        self.status = 200
+
+    def view(self, request):
+        self.renders += 1
+        return HttpResponse(f'render {self.renders}', status=self.status)
+
+    def get(self, view):
+        return view(RequestFactory().get(self.url)).content.decode()
+
+    def hold_lease(self):
+        key = _key(RequestFactory().get(self.url))
+        cache.add(key + ':lease', True, 30)
+
+    def test_fresh_responses_are_served_from_the_cache(self):
+        view = fragment_cache(60)(self.view)
+        self.assertEqual(self.get(view), 'render 1')
+        self.assertEqual(self.get(view), 'render 1')
+        local_cache.clear()
+        self.assertEqual(self.get(view), 'render 1')
+        self.assertEqual(self.renders, 1)
+
+    def test_stale_responses_are_rendered_by_the_lease_holder(self):
+        view = fragment_cache(0)(self.view)
+        self.assertEqual(self.get(view), 'render 1')
+        self.assertEqual(self.get(view), 'render 2')
+
+    def test_stale_responses_are_served_while_another_worker_renders(self):
+        view = fragment_cache(0)(self.view)
+        self.get(view)
+        self.hold_lease()
+        self.assertEqual(self.get(view), 'render 1')
+        self.assertEqual(self.renders, 1)
+
+    def test_missing_responses_are_rendered_despite_the_lease(self):
+        view = fragment_cache(60)(self.view)
+        self.hold_lease()
+        self.assertEqual(self.get(view), 'render 1')
+        self.assertEqual(self.get(view), 'render 1')
+
+    def test_errors_are_not_cached(self):
+        view = fragment_cache(60)(self.view)
+        self.status = 500
+        self.get(view)
+        self.status = 200
+        self.assertEqual(self.get(view), 'render 2')
+
+    def test_the_lease_is_released_when_the_view_fails(self):
+        def failing(request):
+            raise ValueError
+        with self.assertRaises(ValueError):
+            fragment_cache(60)(failing)(RequestFactory().get(self.url))
+        key = _key(RequestFactory().get(self.url))
+        self.assertIsNone(cache.get(key + ':lease'))
+
+    def test_other_methods_are_not_cached(self):
+        view = fragment_cache(60)(self.view)
+        view(RequestFactory().post(self.url))
+        view(RequestFactory().post(self.url))
+        self.assertEqual(self.renders, 2)
+
+    def test_a_new_version_is_rendered_under_the_same_key(self):
+        version = 'a'
+        view = fragment_cache(60, version=lambda request: version)(self.view)
+        self.get(view)
+        version = 'b'
+        self.assertEqual(self.get(view), 'render 2')
+        self.assertEqual(self.get(view), 'render 2')
+
+    def test_the_old_version_is_served_with_its_etag_while_rendering(self):
+        version = 'a'
+        view = fragment_cache(60, version=lambda request: version)(self.view)
+        self.get(view)
+        version = 'b'
+        self.hold_lease()
+        response = view(RequestFactory().get(self.url))
+        self.assertEqual(response.content, b'render 1')
+        self.assertEqual(response['ETag'], '"a"')
+        self.assertEqual(self.renders, 1)
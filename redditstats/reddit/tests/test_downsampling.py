@@ -0,0 +1,27 @@
+from django.test import SimpleTestCase
+
+from ..downsampling import lttb
+
+
+class LttbTests(SimpleTestCase):
+    def test_short_series_are_returned_whole(self):
+        points = [(x, x * 2) for x in range(5)]
+        self.assertEqual(lttb(points, 5), points)
+        self.assertEqual(lttb(points, 10), points)
+        self.assertEqual(lttb(points, 2), points)
+
+    def test_keeps_threshold_points_and_the_ends(self):
+        points = [(x, x % 7) for x in range(100)]
+        sampled = lttb(points, 10)
+        self.assertEqual(len(sampled), 10)
+        self.assertEqual(sampled[0], points[0])
+        self.assertEqual(sampled[-1], points[-1])
+        self.assertEqual(sampled, sorted(sampled))
+
+    def test_keeps_peaks_that_averaging_would_flatten(self):
+        points = [(x, 0) for x in range(100)]
+        points[37] = (37, 1000)
+        points[71] = (71, -1000)
+        sampled = lttb(points, 8)
+        self.assertIn((37, 1000), sampled)
+        self.assertIn((71, -1000), sampled)
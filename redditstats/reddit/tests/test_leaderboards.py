@@ -0,0 +1,113 @@
+from urllib.parse import parse_qs, urlparse
+
+from django.http import Http404
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+from django.views.generic import View
+
+from ..leaderboards import update_user_totals
+from ..models import Comment, Post, Subreddit, User, UserTotal
+from ..views import KeysetMixin, top_users
+
+
+class PageView(KeysetMixin, View):
+    page_size = 2
+
+
+def page(query=''):
+    view = PageView()
+    view.request = RequestFactory().get('/partials/test/' + query)
+    return view
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.subreddit = Subreddit.objects.create(api_id='t5_x', name='x')
+        self.user = User.objects.create(username='u')
+        self.post = Post.objects.create(
+            subreddit=self.subreddit, author=self.user,
+            created=timezone.now(), api_id='t3_a', permalink='', title='')
+
+    def comment(self, score, **fields):
+        return Comment.objects.create(
+            post=self.post, subreddit=self.subreddit, score=score,
+            created=timezone.now(), api_id=f't1_{Comment.objects.count()}',
+            permalink='', depth=0, **fields)
+
+    def walk(self, queryset, **keys):
+        """Return the pages of the queryset up to the last."""
+        pages = []
+        view = page()
+        while True:
+            pages.append(view.paginate(queryset, **keys))
+            if not view.next_page:
+                return pages, view
+            query = urlparse(view.next_page).query
+            view = page('?' + query)
+
+    def test_pages_follow_score_then_id_without_gaps(self):
+        # Ties on the score straddle the page boundaries.
+        comments = [self.comment(score) for score in [5, 3, 3, 3, 1]]
+        self.comment(None)
+        pages, last = self.walk(Comment.objects.all())
+        self.assertEqual([len(rows) for rows in pages], [2, 2, 1])
+        self.assertEqual(
+            [comment.pk for rows in pages for comment in rows],
+            [comment.pk for comment in sorted(
+                comments, key=lambda c: (-c.score, -c.pk))])
+        self.assertEqual(last.start(), 5)
+
+    def test_the_next_page_carries_the_rank_to_start_from(self):
+        for score in [3, 2, 1]:
+            self.comment(score)
+        view = page()
+        view.paginate(Comment.objects.all())
+        self.assertEqual(
+            parse_qs(urlparse(view.next_page).query)['start'], ['3'])
+
+    def test_bad_cursors_are_not_found(self):
+        for query in ['?after=abc', '?after=1', '?after=1_x']:
+            with self.assertRaises(Http404):
+                page(query).paginate(Comment.objects.all())
+        with self.assertRaises(Http404):
+            page('?start=x').start()
+
+    def test_aggregated_rows_page_by_author(self):
+        users = [User.objects.create(username=f'u{i}') for i in range(3)]
+        for user, score in zip(users, [4, 4, 9]):
+            self.comment(score, author=user)
+        update_user_totals()
+        totals = top_users(UserTotal.objects.all(), 'comments', 'comment_score')
+        pages, _ = self.walk(totals, score='total', key='author')
+        self.assertEqual(
+            [row['author'] for rows in pages for row in rows],
+            [users[2].pk, users[1].pk, users[0].pk])
+
+
+class UserTotalsTests(TestCase):
+    def test_totals_per_day_and_author(self):
+        subreddit = Subreddit.objects.create(api_id='t5_x', name='x')
+        user = User.objects.create(username='u')
+        now = timezone.now()
+        post = Post.objects.create(
+            subreddit=subreddit, author=user, created=now, api_id='t3_a',
+            permalink='', title='', refreshed_score=7)
+        question = Comment.objects.create(
+            post=post, subreddit=subreddit, author=user, created=now,
+            api_id='t1_q', permalink='', depth=0, score=2,
+            is_qa_thread=True)
+        Comment.objects.create(
+            post=post, subreddit=subreddit, author=user, created=now,
+            api_id='t1_a', permalink='', depth=1, score=3,
+            is_qa_thread=True, parent=question)
+        Comment.objects.create(
+            post=post, subreddit=subreddit, author=None, created=now,
+            api_id='t1_d', permalink='', depth=0, score=100)
+        update_user_totals()
+        update_user_totals()
+        total = UserTotal.objects.get()
+        self.assertEqual(
+            (total.posts, total.post_score, total.comments,
+             total.comment_score, total.questions, total.question_score,
+             total.answers, total.answer_score),
+            (1, 7, 2, 5, 1, 2, 1, 3))
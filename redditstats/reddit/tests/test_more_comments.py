@@ -0,0 +1,118 @@
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.test import SimpleTestCase
+from praw.models import MoreComments
+
+from .. import more_comments
+from ..more_comments import expand_comments
+
+
+class FakeComment(object):
+    def __init__(self, name, depth=0, score=1, replies=()):
+        self.name = name
+        self.depth = depth
+        self.score = score
+        self.replies = list(replies)
+
+
+class FakeMore(MoreComments):
+    """Loads its replies after ``delay`` seconds and records its client."""
+
+    def __init__(self, name, parent_id='t3_x', count=1, replies=(),
+                 delay=0, log=None):
+        self.name = name
+        self.parent_id = parent_id
+        self.count = count
+        self.loaded = list(replies)
+        self.delay = delay
+        self.log = log if log is not None else []
+
+    def comments(self, update=True):
+        client = self._reddit
+        self.log.append(('start', self.name, client))
+        time.sleep(self.delay)
+        self.log.append(('end', self.name, client))
+        return self.loaded
+
+
+def submission(*comments):
+    return SimpleNamespace(score=10, comments=list(comments))
+
+
+class ExpandCommentsTests(SimpleTestCase):
+    def setUp(self):
+        for patcher in [
+            mock.patch.object(
+                more_comments, '_clients', more_comments.queue.LifoQueue()),
+            mock.patch.object(
+                more_comments, 'reddit', side_effect=lambda: object()),
+        ]:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.reddit = more_comments.reddit
+
+    def names(self, comments):
+        return [comment.name for comment in comments]
+
+    def test_expands_nested_more_comments_parents_first(self):
+        nested = FakeMore('m2', replies=[FakeComment('c3', depth=2)])
+        top = FakeMore('m1', replies=[FakeComment('c2', depth=1), nested])
+        comments = expand_comments(
+            submission(FakeComment('c1'), top),
+            max_requests=10, max_seconds=10, workers=2)
+        self.assertEqual(self.names(comments), ['c1', 'c2', 'c3'])
+
+    def test_stops_after_max_requests_highest_scores_first(self):
+        parents = [FakeComment(f'c{i}', score=i) for i in range(5)]
+        for parent in parents:
+            parent.replies = [FakeMore(
+                f'm{parent.name}', parent_id=parent.name,
+                replies=[FakeComment(f'r{parent.name}', depth=1)])]
+        comments = expand_comments(
+            submission(*parents), max_requests=2, max_seconds=10, workers=1)
+        self.assertEqual(
+            sorted(self.names(comments)[5:]), ['rc3', 'rc4'])
+
+    def test_skips_continue_this_thread_links(self):
+        more = FakeMore('m1', count=0, replies=[FakeComment('c2')])
+        comments = expand_comments(
+            submission(FakeComment('c1'), more),
+            max_requests=10, max_seconds=10, workers=1)
+        self.assertEqual(self.names(comments), ['c1'])
+        self.assertEqual(more.log, [])
+
+    def test_waits_for_requests_in_flight_at_the_deadline(self):
+        log = []
+        mores = [
+            FakeMore(f'm{i}', replies=[FakeComment(f'c{i}')], delay=0.2,
+                     log=log)
+            for i in range(4)]
+        comments = expand_comments(
+            submission(*mores), max_requests=10, max_seconds=0.05,
+            workers=2)
+        # The two requests started before the deadline finished and were
+        # kept, the others never started.
+        self.assertEqual(len(comments), 2)
+        self.assertEqual([entry[0] for entry in log].count('end'), 2)
+        self.assertEqual(threading.active_count(), 1)
+
+    def test_concurrent_requests_never_share_a_client(self):
+        log = []
+        mores = [
+            FakeMore(f'm{i}', replies=[FakeComment(f'c{i}')], delay=0.02,
+                     log=log)
+            for i in range(8)]
+        expand_comments(
+            submission(*mores), max_requests=10, max_seconds=10, workers=3)
+        running = {}
+        for event, name, client in log:
+            if event == 'start':
+                self.assertNotIn(client, running.values())
+                running[name] = client
+            else:
+                del running[name]
+        # Idle clients are reused rather than created for every request.
+        self.assertLessEqual(self.reddit.call_count, 3)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from .. import sketches
+from ..models import Comment, Post, Subreddit, User
+from ..sketches import (
+    add,
+    add_authors,
+    estimate,
+    merge,
+    registers,
+    unique_authors,
+)
+
+
+class HyperLogLogTests(SimpleTestCase):
+    def assertClose(self, estimated, actual, error=0.05):
+        self.assertLessEqual(abs(estimated - actual), actual * error)
+
+    def test_an_empty_sketch_estimates_zero(self):
+        self.assertEqual(estimate(registers(None)), 0)
+
+    def test_small_and_large_cardinalities(self):
+        for count in [10, 1000, 100000]:
+            sketch = add(registers(None), range(count))
+            self.assertClose(estimate(sketch), count)
+
+    def test_duplicates_are_counted_once(self):
+        sketch = add(registers(None), list(range(500)) * 10)
+        self.assertClose(estimate(sketch), 500)
+
+    def test_merging_estimates_the_union(self):
+        first = add(registers(None), range(0, 6000))
+        second = add(registers(None), range(4000, 10000))
+        self.assertClose(estimate(merge([first, second])), 10000)
+
+    def test_registers_survive_a_round_trip_through_bytes(self):
+        sketch = add(registers(None), range(100))
+        self.assertTrue((registers(sketch.tobytes()) == sketch).all())
+
+
+class AddAuthorsTests(TestCase):
+    def test_unique_authors_over_a_range_of_days(self):
+        subreddit = Subreddit.objects.create(api_id='t5_x', name='x')
+        users = [User.objects.create(username=f'u{i}') for i in range(4)]
+        now = timezone.now()
+        post = Post.objects.create(
+            subreddit=subreddit, author=users[0], created=now,
+            api_id='t3_a', permalink='', title='')
+        for i, user in enumerate(users + users):
+            Comment.objects.create(
+                post=post, subreddit=subreddit, author=user, depth=0,
+                created=now - timedelta(days=i % 2), api_id=f't1_{i}',
+                permalink='')
+        # Smaller than the number of comments, to add them in batches.
+        with mock.patch.object(sketches, 'BATCH_SIZE', 3):
+            add_authors(subreddit, Post.objects.all(), Comment.objects.all())
+        today = now.date()
+        self.assertEqual(unique_authors(subreddit, 'posters', today), 1)
+        self.assertEqual(unique_authors(subreddit, 'commenters', today), 2)
+        self.assertEqual(
+            unique_authors(subreddit, 'commenters', today - timedelta(1)), 4)
@@ -0,0 +1,127 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from .. import trending
+from ..models import (
+    Post,
+    PostSnapshot,
+    PostTrend,
+    Subreddit,
+    TrendWatermark,
+    User,
+)
+from ..trending import rates, update_trending
+
+HOUR = timedelta(hours=1)
+
+
+@override_settings(TRENDING={'HALF_LIFE': 3600, 'WINDOW': 6 * 3600})
+class UpdateTrendingTests(TestCase):
+    def setUp(self):
+        self.now = timezone.now()
+        self.subreddit = Subreddit.objects.create(api_id='t5_x', name='x')
+        self.user = User.objects.create(username='u')
+        self.posts = [
+            Post.objects.create(
+                subreddit=self.subreddit, author=self.user, created=self.now,
+                api_id=f't3_{i}', permalink='', title='')
+            for i in range(3)]
+        for post in self.posts:
+            self.snapshot(post, 10, self.now)
+        update_trending(self.now)
+
+    def snapshot(self, post, score, created):
+        snapshot = PostSnapshot.objects.create(
+            post=post, score=score, ups=score, downs=0, comment_count=0)
+        PostSnapshot.objects.filter(pk=snapshot.pk).update(created=created)
+
+    def heat(self, post):
+        return PostTrend.objects.get(pk=post.pk).heat
+
+    def test_the_first_update_starts_after_the_existing_snapshots(self):
+        watermark = TrendWatermark.objects.get()
+        self.assertEqual(
+            watermark.post_snapshot, PostSnapshot.objects.latest('id').id)
+        self.assertFalse(PostTrend.objects.exists())
+
+    def test_only_gains_create_trends(self):
+        self.snapshot(self.posts[0], 60, self.now)
+        self.snapshot(self.posts[1], 20, self.now)
+        self.snapshot(self.posts[2], 5, self.now)
+        update_trending(self.now)
+        trends = PostTrend.objects.order_by('-heat')
+        self.assertEqual(
+            [trend.pk for trend in trends],
+            [self.posts[0].pk, self.posts[1].pk])
+        self.assertAlmostEqual(trends[0].heat, 50, places=3)
+        self.assertEqual(trends[0].score, 60)
+
+    def test_later_gains_weigh_double_per_half_life(self):
+        self.snapshot(self.posts[0], 110, self.now)
+        self.snapshot(self.posts[1], 110, self.now + HOUR)
+        update_trending(self.now + HOUR)
+        self.assertAlmostEqual(
+            self.heat(self.posts[1]) / self.heat(self.posts[0]), 2)
+
+    def test_rates_halve_every_half_life(self):
+        self.snapshot(self.posts[0], 110, self.now)
+        update_trending(self.now)
+        trend = PostTrend.objects.get()
+        now = rates([trend], self.now)[0].rate
+        later = rates([trend], self.now + HOUR)[0].rate
+        self.assertAlmostEqual(later / now, 0.5)
+
+    def test_losses_update_the_score_but_not_the_last_gain(self):
+        self.snapshot(self.posts[0], 110, self.now)
+        update_trending(self.now)
+        self.snapshot(self.posts[0], 90, self.now + HOUR)
+        update_trending(self.now + HOUR)
+        trend = PostTrend.objects.get()
+        self.assertEqual(trend.score, 90)
+        self.assertAlmostEqual(trend.heat, 100 - 20 * 2, places=3)
+        self.assertEqual(trend.gained, self.now)
+
+    def test_trends_are_evicted_a_window_after_their_last_gain(self):
+        self.snapshot(self.posts[0], 110, self.now)
+        self.snapshot(self.posts[1], 110, self.now + 5 * HOUR)
+        update_trending(self.now + 5 * HOUR)
+        update_trending(self.now + 7 * HOUR)
+        self.assertEqual(
+            list(PostTrend.objects.values_list('pk', flat=True)),
+            [self.posts[1].pk])
+
+    def test_rescaling_the_epoch_keeps_the_rates(self):
+        self.snapshot(self.posts[0], 110, self.now)
+        self.snapshot(self.posts[1], 50, self.now)
+        update_trending(self.now)
+        later = self.now + 3 * HOUR
+        before = {
+            trend.pk: trend.rate
+            for trend in rates(list(PostTrend.objects.all()), later)}
+        with mock.patch.object(trending, 'RESCALE_HALF_LIVES', 2):
+            update_trending(later)
+        self.assertEqual(TrendWatermark.objects.get().epoch, later)
+        for trend in rates(list(PostTrend.objects.all()), later):
+            self.assertAlmostEqual(trend.rate, before[trend.pk])
+
+    def test_changed_trends_are_written_once_per_batch(self):
+        for post in self.posts:
+            self.snapshot(post, 20, self.now)
+        update_trending(self.now)
+        for post in self.posts:
+            self.snapshot(post, 30, self.now)
+            self.snapshot(post, 40, self.now)
+        with mock.patch.object(trending, 'BATCH_SIZE', 3), \
+                CaptureQueriesContext(connection) as queries:
+            update_trending(self.now)
+        updates = [
+            query['sql'] for query in queries
+            if query['sql'].startswith('UPDATE "reddit_posttrend"')]
+        self.assertEqual(len(updates), 2)
+        self.assertEqual(
+            set(PostTrend.objects.values_list('score', flat=True)), {40})
@@ -0,0 +1,177 @@
+"""Rank what is rising from the snapshots written since the last update."""
+import math
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import (
+    Case,
+    DateTimeField,
+    F,
+    FloatField,
+    IntegerField,
+    Max,
+    Value,
+    When,
+)
+from django.utils import timezone
+
+from .analytics import HOUR_SECONDS
+from .models import (
+    CommentSnapshot,
+    CommentTrend,
+    PostSnapshot,
+    PostTrend,
+    TrendWatermark,
+)
+
+# The number of snapshots read at a time.
+BATCH_SIZE = 5000
+# Gains are weighted by up to 2 ** RESCALE_HALF_LIVES before the epoch is
+# moved up, well short of overflowing a float.
+RESCALE_HALF_LIVES = 256
+
+
+def _half_lives(start, end):
+    return (end - start).total_seconds() / settings.TRENDING['HALF_LIFE']
+
+
+def update_trending(now=None):
+    """
+    Fold the snapshots written since the last update into the trends.
+
+    Each snapshot adds the points gained since the snapshot before it,
+    doubled for every half-life since the epoch. Older gains so fade
+    against newer ones without the trends being rewritten. Trends are
+    only written when their score moves, and are evicted once they haven't
+    gained for ``settings.TRENDING['WINDOW']`` seconds.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        watermark, created = TrendWatermark.objects.select_for_update(
+        ).get_or_create(pk=1)
+        if created:
+            # Trends start from the snapshots after the first update, rather
+            # than from the whole history in one transaction.
+            watermark.post_snapshot = _last_id(PostSnapshot)
+            watermark.comment_snapshot = _last_id(CommentSnapshot)
+        if watermark.epoch is None:
+            watermark.epoch = now
+        elif _half_lives(watermark.epoch, now) > RESCALE_HALF_LIVES:
+            # Every few weeks the weights are brought back into range.
+            scale = 2 ** -_half_lives(watermark.epoch, now)
+            PostTrend.objects.update(heat=F('heat') * scale)
+            CommentTrend.objects.update(heat=F('heat') * scale)
+            watermark.epoch = now
+
+        watermark.post_snapshot = _consume(
+            PostTrend, PostSnapshot.objects.all(), 'post', 'post__subreddit',
+            watermark.post_snapshot, watermark.epoch)
+        watermark.comment_snapshot = _consume(
+            CommentTrend, CommentSnapshot.objects.all(), 'comment',
+            'comment__subreddit', watermark.comment_snapshot,
+            watermark.epoch)
+        watermark.updated = now
+        watermark.save()
+
+        cold = now - timedelta(seconds=settings.TRENDING['WINDOW'])
+        PostTrend.objects.filter(gained__lt=cold).delete()
+        CommentTrend.objects.filter(gained__lt=cold).delete()
+
+
+def _last_id(model):
+    return model.objects.aggregate(id=Max('id'))['id'] or 0
+
+
+def rates(trends, now=None):
+    """
+    Set ``rate`` on the trends, the points an hour that would hold each
+    trend at its heat.
+    """
+    now = now or timezone.now()
+    epoch = TrendWatermark.objects.values_list('epoch', flat=True).first()
+    if epoch is None:
+        return trends
+    half_life = settings.TRENDING['HALF_LIFE']
+    scale = (
+        2 ** -_half_lives(epoch, now) * math.log(2) / half_life * HOUR_SECONDS)
+    for trend in trends:
+        trend.rate = trend.heat * scale
+    return trends
+
+
+def _previous_scores(snapshots, parent, parents, since):
+    """Return the score of the parents' last snapshots up to id ``since``."""
+    scores = {}
+    parents = sorted(parents)
+    for start in range(0, len(parents), 500):
+        latest = snapshots.filter(**{
+            f'{parent}__in': parents[start:start + 500],
+            'id__lte': since,
+        }).order_by().values(parent).annotate(latest=Max('id'))
+        scores.update(snapshots.filter(
+            id__in=latest.values('latest')).values_list(parent, 'score'))
+    return scores
+
+
+def _consume(model, snapshots, parent, subreddit, since, epoch):
+    """
+    Add the score gains of the snapshots after id ``since`` to the trends
+    and return the id of the last snapshot consumed.
+    """
+    rows = snapshots.values_list('id', parent, subreddit, 'created', 'score')
+    while True:
+        batch = list(rows.filter(id__gt=since).order_by('id')[:BATCH_SIZE])
+        if not batch:
+            return since
+        parents = {row[1] for row in batch}
+        trends = model.objects.in_bulk(parents)
+        # Without a trend, gains are measured from the previous snapshot.
+        scores = _previous_scores(
+            snapshots, parent, parents - set(trends), since)
+        scores.update((pk, trend.score) for pk, trend in trends.items())
+        added = {}
+        changed = set()
+        for _, pk, subreddit_id, created, score in batch:
+            previous = scores.get(pk)
+            scores[pk] = score
+            if previous is None or score == previous:
+                continue
+            trend = trends.get(pk)
+            if trend is None:
+                if score < previous:
+                    continue
+                trend = trends[pk] = added[pk] = model(
+                    pk=pk, subreddit_id=subreddit_id, score=score,
+                    gained=created)
+            elif pk not in added:
+                changed.add(pk)
+            trend.heat += (score - previous) * 2 ** _half_lives(
+                epoch, created)
+            trend.score = score
+            if score > previous:
+                trend.gained = created
+        model.objects.bulk_create(added.values())
+        _update_trends(model, [trends[pk] for pk in changed])
+        since = batch[-1][0]
+
+
+def _update_trends(model, trends):
+    """Write the score, heat and last gain of the trends in one statement."""
+    # Each trend takes seven query parameters, which SQLite limits.
+    size = connection.ops.bulk_batch_size([None] * 7, trends) or 1
+    for start in range(0, len(trends), size):
+        part = trends[start:start + size]
+
+        def case(field, output_field):
+            return Case(*[
+                When(pk=trend.pk, then=Value(
+                    getattr(trend, field), output_field=output_field))
+                for trend in part
+            ], output_field=output_field)
+
+        model.objects.filter(pk__in=[trend.pk for trend in part]).update(
+            score=case('score', IntegerField()),
+            heat=case('heat', FloatField()),
+            gained=case('gained', DateTimeField()),
+        )
@@ -7,6 +7,7 @@ urlpatterns = [
             url(r'^top_short/$', views.TopShortComments.as_view(), name='top_short'),
             url(r'^top_questions/$', views.TopDailyQuestions.as_view(), name='top_questions'),
             url(r'^top_answers/$', views.TopDailyAnswers.as_view(), name='top_answers'),
+            url(r'^rising_now/$', views.RisingComments.as_view(), name='rising_now'),
         ], namespace='comment')),
 
         url(r'^user/', include([
@@ -17,8 +18,17 @@ urlpatterns = [
             url(r'^comment_count/$', views.TopCommenterByCount.as_view(), name='comment_count'),
             url(r'^comment_score/$', views.TopCommenterByScore.as_view(), name='comment_score'),
         ], namespace='user')),
+        url(r'^post/', include([
+            url(r'^fastest_rising/$', views.FastestRisingPosts.as_view(), name='fastest_rising'),
+            url(r'^rising_now/$', views.RisingPosts.as_view(), name='rising_now'),
+        ], namespace='post')),
         url(r'^top_mentions/$', views.TopMentions.as_view(), name='top_mentions'),
         url(r'^mod_activity/$', views.ModActivity.as_view(), name='mod_activity'),
+        url(r'^unique_users/$', views.UniqueUsers.as_view(), name='unique_users'),
     ], namespace='partials')),
+    url(r'^history/', include([
+        url(r'^post/(?P<pk>\d+)/$', views.PostScoreHistory.as_view(), name='post'),
+        url(r'^comment/(?P<pk>\d+)/$', views.CommentScoreHistory.as_view(), name='comment'),
+    ], namespace='history')),
     url(r'^$', views.Dashboard.as_view(), name='dashboard'),
 ]
@@ -1,44 +1,110 @@
 import operator
-from collections import defaultdict
 from datetime import datetime, time, timedelta
 from functools import reduce
+from math import isnan
 
 from django.db.models import (
+    Count,
     F,
     Max,
-    OuterRef,
-    Subquery,
     Sum,
     Q,
-    Case,
-    When,
-    IntegerField,
-    DateTimeField,
 )
 from django.db.models.functions import Length
+from django.http import Http404, JsonResponse
+from django.utils.http import urlencode
 from django.utils import timezone
 from django.utils.decorators import method_decorator
-from django.views.generic import TemplateView
-from django.views.decorators.cache import cache_page
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+from django.views.generic import TemplateView, View
 
 import pytz
 
+from .analytics import HOUR_SECONDS, ScoreHistories, fastest_rising
+from .cache import fragment_cache
+from .downsampling import lttb
 from .models import (
     Comment,
     CommentSnapshot,
+    CommentTrend,
+    Post,
     PostSnapshot,
+    PostTrend,
     Subreddit,
     User,
+    UserTotal,
 )
+from .routers import use_replica
+from .sketches import unique_authors
+from .trending import rates
 
 AUTO_MOD = 'AutoModerator'
+HOMEBREWING = 'homebrewing'
 WEEK_SECONDS = 60 * 60 * 24 * 7
+HISTORY_SECONDS = 60 * 15
 
 
-class HomebrewingMixin(object):
+class ReplicaMixin(object):
+    """Serve the view's reads from the replica database."""
+
+    def dispatch(self, request, *args, **kwargs):
+        with use_replica():
+            response = super(ReplicaMixin, self).dispatch(
+                request, *args, **kwargs)
+            # Render here so the template's lazy querysets use the replica.
+            if hasattr(response, 'render'):
+                response.render()
+        return response
+
+
+class HomebrewingMixin(ReplicaMixin):
     @staticmethod
     def subreddit():
-        return Subreddit.objects.get(name='homebrewing')
+        return Subreddit.objects.get(name=HOMEBREWING)
+
+
+def _ingested(request):
+    """
+    Return when data was last ingested for the subreddit, as seen by the
+    database the partials are rendered from.
+    """
+    if not hasattr(request, '_ingested'):
+        with use_replica():
+            request._ingested = Subreddit.objects.filter(
+                name=HOMEBREWING).values_list('ingested', flat=True).first()
+    return request._ingested
+
+
+def partial_last_modified(request, *args, **kwargs):
+    """
+    Return when a partial last changed, which is either the latest ingest
+    or midnight, when the week being summarized moves on.
+    """
+    ingested = _ingested(request)
+    if ingested is None:
+        return None
+    today = pytz.UTC.localize(
+        datetime.combine(timezone.now().date(), time.min))
+    return max(ingested, today)
+
+
+def partial_etag(request, *args, **kwargs):
+    ingested = _ingested(request)
+    if ingested is None:
+        return None
+    return f'{ingested.timestamp()}-{timezone.now().date()}'
+
+
+# Partials answer conditional requests without rendering when nothing has
+# been ingested since, and browsers are asked to always revalidate them. The
+# cached renders are versioned by the ETag so an ingest renders them again.
+partial_decorators = [
+    cache_control(no_cache=True),
+    condition(
+        etag_func=partial_etag, last_modified_func=partial_last_modified),
+    fragment_cache(WEEK_SECONDS, version=partial_etag),
+]
 
 
 class LatestMixin(object):
@@ -49,74 +115,95 @@ class LatestMixin(object):
         return today - timedelta(days=7)
 
 
-def top_users(queryset, top_count=10):
-    """Return authors with the highest aggregate score for the model"""
-    top = defaultdict(lambda: 0)
-    for author_id, score in queryset.values_list('author', 'score'):
-        top[author_id] += score
-    top_scores = []
-    for user_id, total in top.items():
-        if len(top_scores) < top_count or any(total > s for _, s in top_scores):  # noqa
-            # Check if total is greater than any existing score.
-            if len(top_scores) == top_count:
-                # Pop off the least score and
-                # add this score if we're at the max
-                top_scores.sort(key=lambda s: s[1], reverse=True)
-                top_scores = top_scores[:top_count-1] + [(user_id, total)]
-            else:
-                # Else just add it to the list.
-                top_scores += [(user_id, total)]
-    score_map = dict(top_scores)
-    users = list(User.objects.filter(id__in=score_map.keys()))
-    # Add the score to the user objects
-    for u in users:
-        u.score = score_map.get(u.id)
-    users.sort(key=lambda user: user.score, reverse=True)
-    return users
+def top_users(queryset, count, total):
+    """
+    Return the sum of the ``total`` field of the UserTotal queryset per
+    author, for the authors with a ``count`` in it.
+    """
+    return queryset.filter(**{f'{count}__gt': 0}).order_by().values(
+        'author').annotate(total=Sum(total))
+
+
+class KeysetMixin(object):
+    """
+    Page through a leaderboard in descending (score, id) order.
+
+    The ``after`` parameter holds the score and id of the last row shown,
+    so the next page starts where the index left off instead of counting
+    an OFFSET past the rows before it.
+    """
+    page_size = 10
+
+    def cursor(self):
+        after = self.request.GET.get('after')
+        if not after:
+            return None
+        try:
+            score, pk = after.split('_')
+            return int(score), int(pk)
+        except ValueError:
+            raise Http404
+
+    def start(self):
+        try:
+            return max(int(self.request.GET.get('start', 1)), 1)
+        except ValueError:
+            raise Http404
+
+    def paginate(self, queryset, score='score', key='id'):
+        """
+        Return the page of ``queryset`` after the cursor. Rows may be model
+        instances or, for aggregates, dicts.
+        """
+        cursor = self.cursor()
+        queryset = queryset.filter(**{f'{score}__isnull': False})
+        if cursor:
+            queryset = queryset.filter(
+                Q(**{f'{score}__lt': cursor[0]}) |
+                Q(**{score: cursor[0], f'{key}__lt': cursor[1]}))
+        rows = list(queryset.order_by(
+            f'-{score}', f'-{key}')[:self.page_size + 1])
+        self.next_page = None
+        if len(rows) > self.page_size:
+            last = rows[self.page_size - 1]
+            if not isinstance(last, dict):
+                last = {score: getattr(last, score), key: getattr(last, key)}
+            self.next_page = '{}?{}'.format(self.request.path, urlencode({
+                'after': f'{last[score]}_{last[key]}',
+                'start': self.start() + self.page_size,
+            }))
+        return rows[:self.page_size]
+
+    def get_context_data(self, **kwargs):
+        return super(KeysetMixin, self).get_context_data(
+            next_page=self.next_page,
+            start=self.start(),
+            **kwargs)
 
 
 class LatestCommentsMixin(LatestMixin, HomebrewingMixin):
     def comments(self):
-        subreddit = self.subreddit()
-        comment_snaps = CommentSnapshot.objects.filter(
-            comment__post__subreddit=subreddit,
-            created__gte=self.week_ago())
-        # Create a subquery with the most recent snapshots first.
-        newest = comment_snaps.filter(
-            comment=OuterRef('pk')).order_by('-created')
-
-        comments = Comment.objects.filter(
-            post__subreddit=subreddit,
+        return Comment.objects.filter(
+            subreddit=self.subreddit(),
             created__gte=self.week_ago(),
             author__isnull=False
         ).select_related('author')
-        return comments.annotate(
-            # Get the latest score for the snapshots.
-            score=Subquery(newest.values('score')[:1]))
 
 
 class LatestPostsMixin(LatestMixin, HomebrewingMixin):
     def posts(self):
-        subreddit = self.subreddit()
-        post_snaps = PostSnapshot.objects.filter(
-            post__subreddit=subreddit,
-            created__gte=self.week_ago())
-        # Create a subquery with the most recent snapshots first.
-        newest = post_snaps.filter(post=OuterRef('pk')).order_by('-created')
-        
-        posts = subreddit.posts.filter(
+        posts = self.subreddit().posts.filter(
             created__gte=self.week_ago()).select_related('author')
-        return posts.annotate(
-            # Get the latest score for the snapshots.
-            score=Subquery(newest.values('score')[:1]))
+        # The score of the latest snapshot.
+        return posts.annotate(score=F('refreshed_score'))
 
 
 class TopQuestionsMixin(LatestCommentsMixin):
     def comments(self):
         return super(TopQuestionsMixin, self).comments().filter(
             parent__isnull=True,
-            post__author__username=AUTO_MOD,
-            post__title__startswith='Daily Q & A!',
+            is_qa_thread=True,
+            author_is_bot=False,
         )
 
 
@@ -125,117 +212,117 @@ class TopAnswersMixin(LatestCommentsMixin):
         return super(TopAnswersMixin, self).comments().filter(
             parent__isnull=False,
             depth=1,
-            post__author__username=AUTO_MOD,
-            post__title__startswith='Daily Q & A!',
+            is_qa_thread=True,
+            author_is_bot=False,
         )
 
 
-class TopUsersMixin(LatestMixin, HomebrewingMixin):
+class TopUsersMixin(KeysetMixin, LatestMixin, HomebrewingMixin):
     template_name = 'partials/user/top.html'
     page_size = 3
 
-    def users(self):
-        raise NotImplemented
+    def user_totals(self):
+        return UserTotal.objects.filter(
+            subreddit=self.subreddit(), day__gte=self.week_ago().date())
+
+    def totals(self):
+        """Return the totals of the users as made by top_users."""
+        raise NotImplementedError
 
     def get_context_data(self, **kwargs):
+        totals = self.paginate(self.totals(), score='total', key='author')
+        users = User.objects.in_bulk([row['author'] for row in totals])
+        for row in totals:
+            users[row['author']].score = row['total']
         return super(TopUsersMixin, self).get_context_data(
-            users=self.users()[:self.page_size],
+            users=[users[row['author']] for row in totals],
             **kwargs)
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopShortComments(LatestCommentsMixin, TemplateView):
+@method_decorator(partial_decorators, name='dispatch')
+class TopShortComments(KeysetMixin, LatestCommentsMixin, TemplateView):
     length_limitation = 150
     page_size = 4
     template_name = 'partials/comment/top_short.html'
 
     def get_context_data(self, **kwargs):
-        comments = self.comments().annotate(
-            length=Length('text'),
-        ).filter(
-            length__lt=self.length_limitation,
-        ).order_by('-score')[:self.page_size]
+        comments = self.paginate(
+            self.comments().select_related('body').annotate(
+                length=Length('body__text'),
+            ).filter(
+                length__lt=self.length_limitation,
+            ))
 
         return super(TopShortComments, self).get_context_data(
             comments=comments,
             **kwargs)
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopDailyQuestions(TopQuestionsMixin, TemplateView):
+@method_decorator(partial_decorators, name='dispatch')
+class TopDailyQuestions(KeysetMixin, TopQuestionsMixin, TemplateView):
     page_size = 10
     template_name = 'partials/comment/top_questions.html'
 
     def get_context_data(self, **kwargs):
-        comments = self.comments().order_by('-score')[:self.page_size]
+        comments = self.paginate(self.comments().select_related('body'))
         return super(TopDailyQuestions, self).get_context_data(
             comments=comments,
             **kwargs)
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopDailyQuestionAuthors(TopQuestionsMixin, TopUsersMixin, TemplateView):
-    def users(self):
-        return top_users(self.comments())
+@method_decorator(partial_decorators, name='dispatch')
+class TopDailyQuestionAuthors(TopUsersMixin, TemplateView):
+    def totals(self):
+        return top_users(self.user_totals(), 'questions', 'question_score')
     
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopDailyAnswers(TopAnswersMixin, TemplateView):
+@method_decorator(partial_decorators, name='dispatch')
+class TopDailyAnswers(KeysetMixin, TopAnswersMixin, TemplateView):
     page_size = 6
     template_name = 'partials/comment/top_answers.html'
 
     def get_context_data(self, **kwargs):
-        comments = self.comments().order_by('-score')[:self.page_size]
+        comments = self.paginate(self.comments().select_related('body'))
         return super(TopDailyAnswers, self).get_context_data(
             comments=comments,
             **kwargs)
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopDailyAnswerAuthors(TopAnswersMixin, TopUsersMixin, TemplateView):
-    def users(self):
-        return top_users(self.comments())
+@method_decorator(partial_decorators, name='dispatch')
+class TopDailyAnswerAuthors(TopUsersMixin, TemplateView):
+    def totals(self):
+        return top_users(self.user_totals(), 'answers', 'answer_score')
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
+@method_decorator(partial_decorators, name='dispatch')
 class TopPosterByCount(TopUsersMixin, TemplateView):
-    def users(self):
-        return User.objects.exclude(username=AUTO_MOD).annotate(
-            score=Sum(
-                Case(
-                    When(posts__created__gte=self.week_ago(), then=1),
-                    output_field=IntegerField(),
-                )
-            )
-        ).filter(score__isnull=False).order_by('-score')
+    def totals(self):
+        return top_users(
+            self.user_totals().exclude(author__username=AUTO_MOD),
+            'posts', 'posts')
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopPosterByScore(LatestPostsMixin, TopUsersMixin, TemplateView):
-    def users(self):
-        return top_users(self.posts().exclude(author__username=AUTO_MOD))
+@method_decorator(partial_decorators, name='dispatch')
+class TopPosterByScore(TopUsersMixin, TemplateView):
+    def totals(self):
+        return top_users(
+            self.user_totals().exclude(author__username=AUTO_MOD),
+            'posts', 'post_score')
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
+@method_decorator(partial_decorators, name='dispatch')
 class TopCommenterByCount(TopUsersMixin, TemplateView):
-    def users(self):
-        return User.objects.annotate(
-            score=Sum(
-                Case(
-                    When(comments__created__gte=self.week_ago(), then=1),
-                    output_field=IntegerField(),
-                )
-            )
-        ).filter(score__isnull=False).order_by('-score')
+    def totals(self):
+        return top_users(self.user_totals(), 'comments', 'comments')
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
-class TopCommenterByScore(LatestCommentsMixin, TopUsersMixin, TemplateView):
-    def users(self):
-        return top_users(self.comments())
+@method_decorator(partial_decorators, name='dispatch')
+class TopCommenterByScore(TopUsersMixin, TemplateView):
+    def totals(self):
+        return top_users(self.user_totals(), 'comments', 'comment_score')
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
+@method_decorator(partial_decorators, name='dispatch')
 class TopMentions(LatestPostsMixin, LatestCommentsMixin, TemplateView):
     template_name = 'partials/mentions.html'
     mention_lookups = [
@@ -247,7 +334,7 @@ class TopMentions(LatestPostsMixin, LatestCommentsMixin, TemplateView):
 
     def mentions(self, posts, comments, *terms):
         filters = reduce(
-            operator.or_, [Q(text__icontains=t) for t in terms])
+            operator.or_, [Q(body__text__icontains=t) for t in terms])
         post_f = filters | reduce(
             operator.or_, [Q(title__icontains=t) for t in terms])
         return posts.filter(post_f).count() + comments.filter(filters).count()
@@ -264,59 +351,184 @@ class TopMentions(LatestPostsMixin, LatestCommentsMixin, TemplateView):
             **kwargs)
 
 
-@method_decorator(cache_page(WEEK_SECONDS), name='dispatch')
+@method_decorator(partial_decorators, name='dispatch')
+class FastestRisingPosts(LatestMixin, HomebrewingMixin, TemplateView):
+    page_size = 5
+    template_name = 'partials/post/fastest_rising.html'
+
+    def get_context_data(self, **kwargs):
+        histories = ScoreHistories.load(
+            PostSnapshot.objects.filter(
+                post__subreddit=self.subreddit(),
+                post__created__gte=self.week_ago(),
+            ),
+            'post',
+        )
+        rising = fastest_rising(histories, self.page_size)
+        first_hour = dict(zip(
+            histories.ids.tolist(),
+            histories.score_within(HOUR_SECONDS).tolist()))
+        posts = Post.objects.select_related('author').in_bulk(
+            [post_id for post_id, _ in rising])
+        for post_id, velocity in rising:
+            posts[post_id].velocity = velocity
+            score = first_hour[post_id]
+            posts[post_id].first_hour_score = None if isnan(score) else score
+        return super(FastestRisingPosts, self).get_context_data(
+            posts=[posts[post_id] for post_id, _ in rising],
+            **kwargs)
+
+
+class RisingNowMixin(HomebrewingMixin):
+    page_size = 5
+
+    def trends(self, model):
+        return model.objects.filter(
+            subreddit=self.subreddit(), heat__gt=0,
+        ).order_by('-heat')[:self.page_size]
+
+    def get_context_data(self, trends, **kwargs):
+        return super(RisingNowMixin, self).get_context_data(
+            trends=rates(list(trends)), **kwargs)
+
+
+@method_decorator(partial_decorators, name='dispatch')
+class RisingPosts(RisingNowMixin, TemplateView):
+    template_name = 'partials/post/rising_now.html'
+
+    def get_context_data(self, **kwargs):
+        return super(RisingPosts, self).get_context_data(
+            trends=self.trends(PostTrend).select_related('post__author'),
+            **kwargs)
+
+
+@method_decorator(partial_decorators, name='dispatch')
+class RisingComments(RisingNowMixin, TemplateView):
+    template_name = 'partials/comment/rising_now.html'
+
+    def get_context_data(self, **kwargs):
+        return super(RisingComments, self).get_context_data(
+            trends=self.trends(CommentTrend).select_related(
+                'comment__author', 'comment__body'),
+            **kwargs)
+
+
+@method_decorator(partial_decorators, name='dispatch')
+class UniqueUsers(LatestMixin, HomebrewingMixin, TemplateView):
+    template_name = 'partials/unique_users.html'
+    month_days = 30
+
+    def get_context_data(self, **kwargs):
+        subreddit = self.subreddit()
+        week = self.week_ago().date()
+        month = timezone.now().date() - timedelta(days=self.month_days)
+        return super(UniqueUsers, self).get_context_data(
+            posters_week=unique_authors(subreddit, 'posters', week),
+            commenters_week=unique_authors(subreddit, 'commenters', week),
+            posters_month=unique_authors(subreddit, 'posters', month),
+            commenters_month=unique_authors(subreddit, 'commenters', month),
+            **kwargs)
+
+
+@method_decorator(partial_decorators, name='dispatch')
 class ModActivity(LatestMixin, HomebrewingMixin, TemplateView):
     template_name = 'partials/mod_activity.html'
 
+    def activity(self, queryset, mods):
+        """
+        Return the count and latest creation time of the mods' rows in
+        ``queryset`` this week, by mod id.
+        """
+        rows = queryset.filter(
+            created__gte=self.week_ago(),
+            author__in=mods,
+        ).order_by().values('author').annotate(
+            count=Count('id'),
+            latest=Max('created'),
+        ).values_list('author', 'count', 'latest')
+        return {author: (count, latest) for author, count, latest in rows}
+
     def get_context_data(self, **kwargs):
-        mods = self.subreddit().moderators.exclude(username=AUTO_MOD)
-        mods = mods.annotate(
-            post_count=Sum(
-                Case(
-                    When(posts__created__gte=self.week_ago(), then=1),
-                    output_field=IntegerField(),
-                )
-            ),
-            latest_post=Max(
-                Case(
-                    When(posts__created__gte=self.week_ago(),
-                         then=F('comments__created')),
-                    output_field=DateTimeField(),
-                )
-            ),
-            comment_count=Sum(
-                Case(
-                    When(comments__created__gte=self.week_ago(), then=1),
-                    output_field=IntegerField(),
-                )
-            ),
-            latest_comment=Max(
-                Case(
-                    When(comments__created__gte=self.week_ago(),
-                         then=F('comments__created')),
-                    output_field=DateTimeField(),
-                )
-            )
-        ).filter(Q(comment_count__gt=0) | Q(post_count__gt=0))
+        subreddit = self.subreddit()
+        mods = list(subreddit.moderators.exclude(username=AUTO_MOD))
+        # Posts and comments are aggregated separately, joining both to the
+        # mods at once would count every post once per comment.
+        posts = self.activity(subreddit.posts.all(), mods)
+        comments = self.activity(
+            Comment.objects.filter(subreddit=subreddit), mods)
+        active = []
+        for mod in mods:
+            mod.post_count, mod.latest_post = posts.get(mod.id, (0, None))
+            mod.comment_count, mod.latest_comment = comments.get(
+                mod.id, (0, None))
+            if mod.post_count or mod.comment_count:
+                mod.actions = mod.post_count + mod.comment_count
+                mod.latest = max(
+                    time for time in [mod.latest_post, mod.latest_comment]
+                    if time)
+                active.append(mod)
         return super(ModActivity, self).get_context_data(
-            mods=mods,
+            mods=active,
             **kwargs)
 
 
+class ScoreHistoryMixin(ReplicaMixin):
+    """Return an object's score history as JSON, downsampled to ?points="""
+    model = None
+    snapshot_model = None
+    snapshot_field = None
+    default_points = 100
+    max_points = 1000
+
+    def points(self):
+        try:
+            points = int(self.request.GET.get('points', self.default_points))
+        except ValueError:
+            points = self.default_points
+        return max(min(points, self.max_points), 3)
+
+    def get(self, request, pk):
+        snapshots = self.snapshot_model.objects.filter(
+            **{self.snapshot_field: pk}
+        ).order_by('created').values_list('created', 'score')
+        history = [
+            (created.timestamp(), score) for created, score in snapshots]
+        if not history and not self.model.objects.filter(pk=pk).exists():
+            raise Http404
+        return JsonResponse({
+            'id': int(pk),
+            'points': lttb(history, self.points()),
+        })
+
+
+@method_decorator(fragment_cache(HISTORY_SECONDS), name='dispatch')
+class PostScoreHistory(ScoreHistoryMixin, View):
+    model = Post
+    snapshot_model = PostSnapshot
+    snapshot_field = 'post'
+
+
+@method_decorator(fragment_cache(HISTORY_SECONDS), name='dispatch')
+class CommentScoreHistory(ScoreHistoryMixin, View):
+    model = Comment
+    snapshot_model = CommentSnapshot
+    snapshot_field = 'comment'
+
+
 class Dashboard(LatestCommentsMixin, LatestPostsMixin, TemplateView):
     template_name = 'subreddit/homebrewing.html'
 
     def get_context_data(self, **kwargs):
-        essay_comment = self.comments().annotate(
-            length=Length('text'),
+        essay_comment = self.comments().select_related('body').annotate(
+            length=Length('body__text'),
         ).filter(length__gt=1000).order_by('-score').first()
-        image_post = self.posts().filter(
+        image_post = self.posts().select_related('body').filter(
             Q(url__contains='imgur.com') |
-            Q(Q(text__contains='http://imgur.com') & ~Q(text__contains='http://imgur.com/a/'))
+            Q(Q(body__text__contains='http://imgur.com') & ~Q(body__text__contains='http://imgur.com/a/'))
         ).order_by('-score').first()
         image_url = image_post.url
         if not image_url or 'imgur.com' not in image_url:
-            text = image_post.text.replace('\n', ' ')
+            text = image_post.body.text.replace('\n', ' ')
             http_index = text.index('http://imgur.com')
             try:
                 s_index = text[http_index:].index(' ') + http_index
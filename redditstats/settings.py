@@ -11,11 +11,28 @@ REDDIT = {
     'user_agent': os.environ.get('REDDIT_AGENT'),
 }
 
+# The budget for expanding the collapsed comment threads of each post.
+MORE_COMMENTS = {
+    'max_requests': int(os.environ.get('MORE_COMMENTS_REQUESTS', 10)),
+    'max_seconds': int(os.environ.get('MORE_COMMENTS_SECONDS', 30)),
+    'workers': int(os.environ.get('MORE_COMMENTS_WORKERS', 4)),
+}
+
+# Score gains count half as much toward what is rising every HALF_LIFE
+# seconds. Trends that haven't gained points for WINDOW seconds are dropped.
+TRENDING = {
+    'HALF_LIFE': 60 * 60,
+    'WINDOW': 6 * 60 * 60,
+}
+
 SECRET_KEY = os.environ.get('SECRET_KEY', 'not-so-secret')
 
 
 DEBUG = bool(os.environ.get('DEBUG', False))
 
+# Store the rendered HTML of post and comment bodies zlib compressed.
+COMPRESS_BODY_HTML = bool(os.environ.get('COMPRESS_BODY_HTML', False))
+
 ALLOWED_HOSTS = ['*']
 
 
@@ -56,9 +73,33 @@ if MEMCACHED_PASS and MEMCACHED_USER:
         'password': MEMCACHED_PASS,
     }
 
+# The rendered partials are also kept in a small per-process cache in front
+# of memcached. Stale partials are served for up to STALE_TIMEOUT seconds
+# while a single worker renders them again.
+FRAGMENT_CACHE = {
+    'LOCAL_SIZE': 256,
+    'LOCAL_TIMEOUT': 30,
+    'LEASE_TIMEOUT': 60,
+    'STALE_TIMEOUT': 60 * 60,
+}
+
 DATABASES = {
     'default': dj_database_url.config(env='DATABASE_URL'),
 }
+# The dashboard views read from this database when it's configured. Point
+# REPLICA_DATABASE_URL at the primary to try the routing locally.
+REPLICA_DATABASE = 'replica'
+if os.environ.get('REPLICA_DATABASE_URL'):
+    DATABASES[REPLICA_DATABASE] = dj_database_url.config(
+        env='REPLICA_DATABASE_URL')
+    DATABASES[REPLICA_DATABASE]['TEST'] = {'MIRROR': 'default'}
+# Read from the primary instead when the replica is further behind than
+# this many seconds. Unset to never check the replica's lag.
+REPLICA_MAX_LAG = (
+    float(os.environ['REPLICA_MAX_LAG'])
+    if os.environ.get('REPLICA_MAX_LAG') else None
+)
+DATABASE_ROUTERS = ['redditstats.reddit.routers.ReplicaRouter']
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -109,6 +150,11 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 
+# Publish the dashboard as a static page to PUBLISH_ROOT after each ingest.
+# The page is served at / while publishing is enabled.
+PUBLISH_DASHBOARD = bool(os.environ.get('PUBLISH_DASHBOARD', False))
+PUBLISH_ROOT = os.path.join(BASE_DIR, 'published')
+
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -171,5 +217,8 @@ LOGGING = {
             'level': 'ERROR',
             'propagate': True,
         },
+        'redditstats.reddit': {
+            'level': 'INFO',
+        },
     }
 }
@@ -6,4 +6,12 @@ function remoteLoad() {
 }
 $(function() {
    remoteLoad()
+   // Replace a "load more" link with the next page of its leaderboard.
+   $(document).on('click', '.load-more', function(event) {
+       event.preventDefault()
+       var link = $(this)
+       $.get(link.attr('href'), function(html) {
+           link.replaceWith(html)
+       })
+   })
 })
@@ -13,4 +13,6 @@ from dj_static import Cling, MediaCling
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "redditstats.settings")
 
-application = Cling(MediaCling(get_wsgi_application()))
+from redditstats.reddit.cling import PublishedCling
+
+application = Cling(MediaCling(PublishedCling(get_wsgi_application())))